@@ -1,11 +1,22 @@
 from django.contrib import admin
 from django import forms
 from django.contrib.admin.models import LogEntry
+from django.db import transaction
 
 from simple_history.admin import SimpleHistoryAdmin
 from taggit.forms import TagWidget
 
 from .models import Project, Task
+from .services import touch_tasks
+
+
+def _update_tasks(queryset, **updates) -> int:
+    """Bulk update tasks of any users, stamping change sequences for delta sync"""
+    with transaction.atomic():
+        user_ids = sorted(set(queryset.values_list("user_id", flat=True)))
+        for user_id in user_ids:
+            touch_tasks(queryset.filter(user_id=user_id), user_id)
+        return queryset.update(**updates)
 
 
 @admin.register(LogEntry)
@@ -90,13 +101,13 @@ class TaskAdmin(SimpleHistoryAdmin):
     history_list_per_page = 50
 
     def mark_completed(self, request, queryset):
-        updated = queryset.update(status=Task.COMPLETED, is_completed=True)
+        updated = _update_tasks(queryset, status=Task.COMPLETED, is_completed=True)
         self.message_user(request, f"{updated} task(s) marked completed.")
 
     mark_completed.short_description = "Mark selected tasks as completed"
 
     def mark_in_progress(self, request, queryset):
-        updated = queryset.update(status=Task.ON_BOARD, is_completed=False)
+        updated = _update_tasks(queryset, status=Task.ON_BOARD, is_completed=False)
         self.message_user(request, f"{updated} task(s) marked in progress.")
 
     mark_in_progress.short_description = "Mark selected tasks as in progress"
@@ -0,0 +1,137 @@
+"""
+Per user cache of serialized boards (`tasks.list` payloads) in Redis.
+
+Cached boards are keyed by the user's cache generation & a signature of the
+fetch params (filters, cursor, page size). Every task write bumps the
+generation once its transaction commits (see `services.reserve_change_seq`),
+so stale boards are never read again & simply expire with the cache timeout.
+
+Title autocomplete results of a user's recent queries are cached the same way.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from typing import Callable
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+BOARD_CACHE_ALIAS = "task_boards"
+# boards bigger than this are always loaded from DB to bound the cache memory
+BOARD_CACHE_MAX_TASKS = getattr(settings, "BOARD_CACHE_MAX_TASKS", 2000)
+
+# autocomplete runs on every key stroke, only recent queries are worth keeping
+AUTOCOMPLETE_CACHE_TIMEOUT = 300
+
+_HITS_KEY = "stats:hits"
+_MISSES_KEY = "stats:misses"
+
+
+def _generation_key(user_id: int | str) -> str:
+    return f"user:{user_id}:generation"
+
+
+def _get_generation(cache, user_id: int | str) -> int:
+    # a generation evicted from cache restarts from the current time, so it
+    # can't collide with keys of boards cached before the eviction
+    return cache.get_or_set(_generation_key(user_id), time.time_ns, timeout=None)
+
+
+def _board_key(user_id: int | str, generation: int, params: dict) -> str:
+    signature = hashlib.sha1(
+        json.dumps(params, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return f"user:{user_id}:gen:{generation}:{signature}"
+
+
+def _incr_stat(key: str):
+    cache = caches[BOARD_CACHE_ALIAS]
+    try:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+    except Exception as e:
+        logger.warning(f"Failed to update board cache stat {key}: {e}")
+
+
+def get_or_load_board(user_id: int | str, params: dict, load: Callable[[], dict]):
+    """
+    Return the cached board of a user for `params` or build it with `load`
+    & cache it. Falls back to `load` if the cache is unreachable.
+    """
+    cache = caches[BOARD_CACHE_ALIAS]
+    try:
+        key = _board_key(user_id, _get_generation(cache, user_id), params)
+        board = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Board cache unavailable for user_id={user_id}: {e}")
+        return load()
+
+    if board is not None:
+        _incr_stat(_HITS_KEY)
+        return board
+    _incr_stat(_MISSES_KEY)
+
+    board = load()
+    if len(board["data"]) <= BOARD_CACHE_MAX_TASKS:
+        try:
+            cache.set(key, board)
+        except Exception as e:
+            logger.warning(f"Failed to cache board for user_id={user_id}: {e}")
+    return board
+
+
+def get_or_load_autocomplete(user_id: int | str, query: str, load: Callable[[], dict]):
+    """
+    Return cached autocomplete results of a user for `query` or build them
+    with `load`. Results are dropped with the boards on every task write.
+    """
+    cache = caches[BOARD_CACHE_ALIAS]
+    try:
+        params = {"autocomplete": query.strip().lower()}
+        key = _board_key(user_id, _get_generation(cache, user_id), params)
+        results = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Autocomplete cache unavailable for user_id={user_id}: {e}")
+        return load()
+
+    if results is None:
+        results = load()
+        try:
+            cache.set(key, results, timeout=AUTOCOMPLETE_CACHE_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Failed to cache autocomplete for user_id={user_id}: {e}")
+    return results
+
+
+def _bump_generation(user_id: int | str):
+    try:
+        caches[BOARD_CACHE_ALIAS].incr(_generation_key(user_id))
+    except ValueError:
+        # no generation yet, so no board of this user is cached
+        pass
+    except Exception as e:
+        logger.error(
+            f"Failed to invalidate board cache for user_id={user_id}: {e}",
+            exc_info=True,
+        )
+
+
+def invalidate_board_cache(user_id: int | str):
+    """Drop the cached boards of a user once the current transaction commits"""
+    transaction.on_commit(lambda: _bump_generation(user_id))
+
+
+def get_board_cache_stats() -> dict:
+    cache = caches[BOARD_CACHE_ALIAS]
+    hits = cache.get(_HITS_KEY, 0)
+    misses = cache.get(_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0,
+    }
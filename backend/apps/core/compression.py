@@ -0,0 +1,48 @@
+"""
+Opt-in compression of large websocket frames.
+
+Clients which can inflate frames connect with `?compression=deflate`, the
+consumer confirms it in its `connected` message (`"compression": "deflate"`).
+JSON frames of at least `WS_COMPRESSION_THRESHOLD` bytes are then sent as zlib
+compressed binary frames, smaller ones stay text frames. Without the query
+param every frame is plain JSON text, like before.
+"""
+
+import asyncio
+import zlib
+from urllib.parse import parse_qs
+from django.conf import settings
+
+SUPPORTED_COMPRESSION = "deflate"
+
+
+class CompressedJsonMixin:
+    """Mix into an `AsyncJsonWebsocketConsumer` before it"""
+
+    compression: str | None = None
+
+    def negotiate_compression(self) -> str | None:
+        """Pick the compression asked for in the query string, if supported"""
+        query = parse_qs(self.scope.get("query_string", b"").decode())  # type:ignore
+        if SUPPORTED_COMPRESSION in query.get("compression", []):
+            self.compression = SUPPORTED_COMPRESSION
+        return self.compression
+
+    async def encode_frame(self, content) -> str | bytes:
+        """Encoded `content`, override for other wire formats than JSON"""
+        return await self.encode_json(content)  # type:ignore
+
+    async def send_json(self, content, close=False):
+        frame = await self.encode_frame(content)
+        if self.compression:
+            # the threshold is in bytes, non ASCII text takes more than its length
+            data = frame.encode() if isinstance(frame, str) else frame
+            if len(data) >= settings.WS_COMPRESSION_THRESHOLD:
+                # big boards take a while to compress, keep the event loop free
+                frame = await asyncio.to_thread(
+                    zlib.compress, data, settings.WS_COMPRESSION_LEVEL
+                )
+        if isinstance(frame, bytes):
+            await self.send(bytes_data=frame, close=close)  # type:ignore
+        else:
+            await self.send(text_data=frame, close=close)  # type:ignore
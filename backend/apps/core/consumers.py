@@ -1,18 +1,58 @@
+import asyncio
+import functools
 import json
 import logging
+import datetime
 from channels.consumer import database_sync_to_async
+from django.conf import settings
 from django.http import HttpRequest
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 
-from .selectors import get_filtered_tasks_for_user_serialized
+from .selectors import (
+    MAX_TASKS_PAGE_SIZE,
+    TASKS_PAGE_SIZE,
+    get_filtered_tasks_for_user_serialized,
+    get_filtered_tasks_page_for_user_serialized,
+    get_task_change_seq,
+    get_tasks_changed_since_serialized,
+    get_virtual_occurrences_serialized,
+    parse_virtual_task_id,
+    search_tasks_for_user_serialized,
+    SEARCH_RESULTS_LIMIT,
+)
 from .services import TaskService
+from .cache import get_or_load_board
+from .publisher import apublish
+from .notifications import FrameCoalescer
+from .compression import CompressedJsonMixin
+from .wire_format import FIELD_CODES, MSGPACK_FORMAT, MsgpackMixin
 
 # Set up logger with module name for better debugging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
-class TasksConsumer(AsyncJsonWebsocketConsumer):
+# actions of a connection run concurrently (see `TasksConsumer.receive_json`),
+# their sync work runs on the executor's threads, not the one shared sync thread
+action_sync_to_async = functools.partial(database_sync_to_async, thread_sensitive=False)
+
+
+def _action_task_ids(payload) -> set[str]:
+    """Ids of the tasks an action's `payload` refers to"""
+    if isinstance(payload, (int, str)):
+        return {str(payload)}
+    if isinstance(payload, list):
+        return set().union(*[_action_task_ids(item) for item in payload])
+    if isinstance(payload, dict):
+        ids = [payload.get("id"), payload.get("task_id")]
+        # a malformed `ids` is left to the handler to reject
+        if isinstance(payload.get("ids"), list):
+            ids += payload["ids"]
+        return {str(task_id) for task_id in ids if isinstance(task_id, (int, str))}
+    return set()
+
+
+class TasksConsumer(MsgpackMixin, CompressedJsonMixin, AsyncJsonWebsocketConsumer):
     """
     Consumer for sending/recieving Task data. sending data
     must be serialized using `TaskSerializer`
@@ -24,21 +64,38 @@ class TasksConsumer(AsyncJsonWebsocketConsumer):
         request.user = user
         return request
 
+    def _with_virtual_id(self, task_data, task_id):
+        """Tell the client which virtual occurrence became this task"""
+        if parse_virtual_task_id(task_id):
+            return {**task_data, "virtual_id": task_id}
+        return task_data
+
     # -- Action registry --------------------------------------------------
     ACTION_HANDLERS: dict[str, str] = {
         "fetch_tasks": "handle_fetch_tasks",
+        "sync_since": "handle_sync_since",
+        "search_tasks": "handle_search_tasks",
         "create_task": "handle_create_task",
+        "create_tasks": "handle_create_tasks",
         "delete_task": "handle_delete_task",
         "update_task": "handle_update_task",
         "update_task_order": "handle_update_task_order",
+        "move_task": "handle_move_task",
         "assign_project": "handle_assign_project",
         "turn_off_repeat": "handle_turn_off_repeat",
         "toggle_completion": "handle_toggle_completion",
         "task_dropped_to_cal": "handle_task_dropped_to_cal",
+        "bulk_complete": "handle_bulk_complete",
+        "bulk_delete": "handle_bulk_delete",
+        "bulk_move": "handle_bulk_move",
+        "bulk_assign_project": "handle_bulk_assign_project",
         "refresh_for_rec_task": "refresh_for_rec_task",  # used by celery task to send update to client
         "full_refresh": "full_refresh",
     }
 
+    # actions reading the board, they wait for all actions received before them
+    READ_ACTIONS = {"fetch_tasks", "sync_since", "search_tasks"}
+
     # -- Connection lifecycle --------------------------------------------
     async def connect(self):
         try:
@@ -53,8 +110,28 @@ class TasksConsumer(AsyncJsonWebsocketConsumer):
 
                 self.task_service = TaskService(self.user)
                 self.request = self._prepare_req_obj_with_user(self.user)
-
-                await self.send_json({"type": "connected"})
+                self.coalescer = FrameCoalescer()
+                self.flush_task = None
+                # held frames & replies go out in the order they're sent in
+                self.send_lock = asyncio.Lock()
+                self.action_slots = asyncio.Semaphore(
+                    settings.WS_MAX_CONCURRENT_ACTIONS
+                )
+                # last action received per task id, see `receive_json`
+                self.action_tails: dict[str, asyncio.Task] = {}
+                self.action_tasks: set[asyncio.Task] = set()
+
+                wire_format = self.negotiate_wire_format()
+                connected = {
+                    "type": "connected",
+                    "compression": self.negotiate_compression(),
+                    "format": wire_format,
+                }
+                if wire_format == MSGPACK_FORMAT:
+                    connected["field_codes"] = FIELD_CODES
+                # sent as JSON, the client can read it whatever was negotiated
+                await self.send_json(connected)
+                self.wire_format = wire_format
                 logger.info(
                     f"WebSocket connection established for user: {self.user.id}"
                 )
@@ -67,69 +144,124 @@ class TasksConsumer(AsyncJsonWebsocketConsumer):
             await self.close(code=1011, reason=f"Server error: {str(e)}")
 
     async def disconnect(self, code):
+        if getattr(self, "flush_task", None):
+            self.flush_task.cancel()
+        for action_task in getattr(self, "action_tasks", set()).copy():
+            action_task.cancel()
         if getattr(self, "user", None) and self.user.is_authenticated:
             group_name = f"tasks_user_{self.user.id}"
             await self.channel_layer.group_discard(group_name, self.channel_name)  # type:ignore
         await super().disconnect(code)
 
     async def receive_json(self, content, **kwargs):
+        """
+        Start the action of `content` & return, so later actions don't wait for
+        it. At most `WS_MAX_CONCURRENT_ACTIONS` actions of a connection run at
+        once, actions touching the same task run in the order they came in &
+        `READ_ACTIONS` run after every action received before them.
+        The action's `request_id` is echoed in its response.
+        """
+        task_ids = _action_task_ids(content.get("payload"))
+        # waits for a free slot, later messages queue up meanwhile
+        await self.action_slots.acquire()
+        try:
+            if content.get("action") in self.READ_ACTIONS:
+                # reads see the writes sent before them, whatever tasks they touch
+                predecessors = set(self.action_tasks)
+            else:
+                # actions on the same tasks received before this one
+                predecessors = {
+                    self.action_tails[task_id]
+                    for task_id in task_ids
+                    if task_id in self.action_tails
+                }
+            action_task = asyncio.create_task(
+                self._run_action(content, predecessors),
+                name=str(content.get("action")),
+            )
+        except BaseException:
+            # the slot is released by `_run_action` only once it was started
+            self.action_slots.release()
+            raise
+        for task_id in task_ids:
+            self.action_tails[task_id] = action_task
+        self.action_tasks.add(action_task)
+        action_task.add_done_callback(lambda done: self._forget_action(done, task_ids))
+
+    def _forget_action(self, action_task, task_ids):
+        self.action_tasks.discard(action_task)
+        for task_id in task_ids:
+            if self.action_tails.get(task_id) is action_task:
+                del self.action_tails[task_id]
+
+    async def _run_action(self, content, predecessors):
+        try:
+            if predecessors:
+                await asyncio.wait(predecessors)
+            response = await self._handle_action(content)
+            if response is not None:
+                if "request_id" in content:
+                    response = {**response, "request_id": content["request_id"]}
+                await self._reply(response)
+        finally:
+            self.action_slots.release()
+
+    async def _handle_action(self, content):
         try:
             action = content.get("action")
 
             if not action:
                 logger.warning("No action specified in WebSocket message")
-                await self.send_json(
-                    {
-                        "type": "error",
-                        "error": "No action specified",
-                        "details": 'The message must contain an "action" field',
-                    }
-                )
-                return
+                return {
+                    "type": "error",
+                    "error": "No action specified",
+                    "details": 'The message must contain an "action" field',
+                }
 
             handler_name = self.ACTION_HANDLERS.get(action)
             if not hasattr(self, handler_name):  # type:ignore
                 logger.warning(f"No handler found for action: {action}")
-                await self.send_json(
-                    {
-                        "type": "error",
-                        "error": "Invalid action",
-                    }
-                )
-                return
+                return {
+                    "type": "error",
+                    "error": "Invalid action",
+                }
 
             handler = getattr(self, handler_name)  # type:ignore
             payload = content.get("payload", {})
 
             try:
-                response = await handler(payload)
-                await self.send_json(response)
+                return await handler(payload)
             except Exception as e:
                 logger.error(
                     f"Error handling action '{action}': {str(e)}", exc_info=True
                 )
-                await self.send_json(
-                    {
-                        "type": "error",
-                        "error": f"Error processing {action}",
-                        "details": str(e),
-                    }
-                )
+                return {
+                    "type": "error",
+                    "error": f"Error processing {action}",
+                    "details": str(e),
+                }
 
         except json.JSONDecodeError as e:
             logger.error(f"JSON decode error: {e}")
-            await self.send_json({"error": "Invalid JSON received"})
+            return {"error": "Invalid JSON received"}
 
         except Exception as e:
             logger.error(f"Unexpected error: {e}")
-            await self.send_json({"error": "An error occurred"})
+            return {"error": "An error occurred"}
 
     async def handle_fetch_tasks(self, filter_data):
         try:
-            tasks_data = await get_filtered_tasks_for_user_serialized(
-                self.user.id, filter_data
-            )
-            return {"type": "tasks.list", "data": tasks_data}
+            filter_data = dict(filter_data or {})
+            # pagination is opt-in, clients sending only filters get every task
+            cursor = filter_data.pop("cursor", None)
+            page_size = filter_data.pop("page_size", None)
+            if page_size is not None or cursor is not None:
+                page_size = int(page_size or TASKS_PAGE_SIZE)
+                if not 0 < page_size <= MAX_TASKS_PAGE_SIZE:
+                    raise ValueError(
+                        f"page_size must be between 1 and {MAX_TASKS_PAGE_SIZE}"
+                    )
+            return await self._fetch_tasks(filter_data, cursor, page_size)
 
         except Exception as e:
             logger.error(
@@ -141,7 +273,62 @@ class TasksConsumer(AsyncJsonWebsocketConsumer):
                 "details": str(e),
             }
 
-    @database_sync_to_async
+    @action_sync_to_async
+    def _fetch_tasks(self, filter_data, cursor, page_size):
+        def load_tasks_list():
+            # read the version first, tasks written meanwhile are synced again
+            version = get_task_change_seq(self.user.id)
+            if page_size is None:
+                tasks_data = get_filtered_tasks_for_user_serialized(
+                    self.user.id, filter_data
+                )
+                if settings.VIRTUAL_RECURRENCE:
+                    tasks_data += get_virtual_occurrences_serialized(
+                        self.user.id, filter_data
+                    )
+                return {"type": "tasks.list", "data": tasks_data, "version": version}
+
+            tasks_data, next_cursor = get_filtered_tasks_page_for_user_serialized(
+                self.user.id, filter_data, cursor, page_size
+            )
+            return {
+                "type": "tasks.list",
+                "data": tasks_data,
+                "next_cursor": next_cursor,
+                "version": version,
+            }
+
+        params = {"filters": filter_data, "cursor": cursor, "page_size": page_size}
+        return get_or_load_board(self.user.id, params, load_tasks_list)
+
+    @action_sync_to_async
+    def _sync_since(self, version):
+        return get_tasks_changed_since_serialized(self.user.id, version)
+
+    async def handle_sync_since(self, payload):
+        """
+        Delta sync: send tasks changed & ids of tasks deleted after the
+        `version` the client saw last. Clients apply `data` before `deleted`.
+        """
+        version = int(payload.get("version") or 0)
+        changes = await self._sync_since(version)
+        if changes is None:
+            # too old to replay, client has to fetch the whole board again
+            return {"type": "full_refresh"}
+        return {"type": "tasks.sync", **changes}
+
+    @action_sync_to_async
+    def _search_tasks(self, query, limit):
+        return search_tasks_for_user_serialized(self.user.id, query, limit)
+
+    async def handle_search_tasks(self, payload):
+        query = payload.get("query", "")
+        tasks_data = await self._search_tasks(
+            query, payload.get("limit") or SEARCH_RESULTS_LIMIT
+        )
+        return {"type": "tasks.search_results", "query": query, "data": tasks_data}
+
+    @action_sync_to_async
     def _create_task(self, payload):
         serialized_data, is_created = self.task_service.create_task(
             payload, self.request
@@ -157,31 +344,61 @@ class TasksConsumer(AsyncJsonWebsocketConsumer):
     async def handle_create_task(self, payload):
         return await self._create_task(payload)
 
-    @database_sync_to_async
+    @action_sync_to_async
+    def _create_tasks(self, payload):
+        serialized_data, is_created = self.task_service.create_tasks(
+            payload, self.request
+        )
+        if is_created:
+            return {"type": "task.created_many", "data": serialized_data}
+        return {
+            "type": "error",
+            "error": "Failed to create tasks",
+            "details": serialized_data,
+        }
+
+    async def handle_create_tasks(self, payload):
+        return await self._create_tasks(payload)
+
+    @action_sync_to_async
     def _delete_task(self, task_id):
         task_data = self.task_service.delete_task(task_id)
         return {"type": "task.deleted", "id": task_data.get("id")}
 
     async def handle_delete_task(self, task_id):
         logger.info(f"Deleting task: task_id={task_id} by user_id={self.user.id}")
-        response = await self._delete_task(task_id)
-        await self.send_json(response)
+        return await self._delete_task(task_id)
 
-    @database_sync_to_async
+    @action_sync_to_async
     def _update_task_order(self, tasks):
-        self.task_service.update_task_order(tasks)
+        self.task_service.bulk_update_task_order(tasks)
+        return {"type": "tasks.order_updated", "ids": [t["id"] for t in tasks]}
 
     async def handle_update_task_order(self, tasks):
         logger.info(
             f"websocket - Bulk update order by user_id={self.user.id} for task_ids={[t['id'] for t in tasks]}"
         )
-        await self._update_task_order(tasks)
+        return await self._update_task_order(tasks)
+
+    @action_sync_to_async
+    def _move_task(self, task_id, before_id, after_id):
+        task_data = self.task_service.move_task(task_id, before_id, after_id)
+        return {"type": "task.moved", "data": self._with_virtual_id(task_data, task_id)}
+
+    async def handle_move_task(self, payload):
+        return await self._move_task(
+            payload["id"], payload.get("before_id"), payload.get("after_id")
+        )
 
-    @database_sync_to_async
+    @action_sync_to_async
     def _update_task(self, task_data):
+        task_id = task_data.get("id")
         updated_task, is_updated = self.task_service.update_task(task_data)
         if is_updated:
-            return {"type": "task.updated", "data": updated_task}
+            return {
+                "type": "task.updated",
+                "data": self._with_virtual_id(updated_task, task_id),
+            }
         return {
             "type": "error",
             "error": "Failed to update task",
@@ -189,45 +406,48 @@ class TasksConsumer(AsyncJsonWebsocketConsumer):
         }
 
     async def handle_update_task(self, task_data):
-        response_data = await self._update_task(task_data)
-        await self.send_json(response_data)
+        return await self._update_task(task_data)
 
-    @database_sync_to_async
+    @action_sync_to_async
     def _assign_project(self, task_id, project_id):
         task_data = self.task_service.assign_project_to_task(task_id, project_id)
-        return {"type": "task.updated", "data": task_data}
+        return {
+            "type": "task.updated",
+            "data": self._with_virtual_id(task_data, task_id),
+        }
 
     async def handle_assign_project(self, data):
         task_id, project_id = data["task_id"], data["project_id"]
-        response_data = await self._assign_project(task_id, project_id)
-        await self.send_json(response_data)
+        return await self._assign_project(task_id, project_id)
 
-    @database_sync_to_async
+    @action_sync_to_async
     def _turn_off_repeat(self, task_id):
         self.task_service.turn_off_repeat(task_id)
         return {"type": "full_refresh"}
 
     async def handle_turn_off_repeat(self, task_id):
-        response_data = await self._turn_off_repeat(task_id)
-        await self.send_json(response_data)
+        return await self._turn_off_repeat(task_id)
 
-    @database_sync_to_async
+    @action_sync_to_async
     def _toggle_completion(self, task_id):
         updated_task = self.task_service.toggle_task_completion(task_id)
         return {
             "type": "task.updated",
-            "data": updated_task,
+            "data": self._with_virtual_id(updated_task, task_id),
         }
 
     async def handle_toggle_completion(self, task_id):
-        response_data = await self._toggle_completion(task_id)
-        await self.send_json(response_data)
+        return await self._toggle_completion(task_id)
 
-    @database_sync_to_async
+    @action_sync_to_async
     def _task_dropped_to_cal(self, task_data):
+        task_id = task_data.get("id")
         updated_task, is_updated = self.task_service.update_task(task_data)
         if is_updated:
-            return {"type": "task.cal_task_updated", "data": updated_task}
+            return {
+                "type": "task.cal_task_updated",
+                "data": self._with_virtual_id(updated_task, task_id),
+            }
         return {
             "type": "error",
             "error": "Failed to update task",
@@ -235,18 +455,124 @@ class TasksConsumer(AsyncJsonWebsocketConsumer):
         }
 
     async def handle_task_dropped_to_cal(self, task_data):
-        response_data = await self._task_dropped_to_cal(task_data)
-        await self.send_json(response_data)
+        return await self._task_dropped_to_cal(task_data)
+
+    # -- Bulk actions -----------------------------------------------------
+    async def _broadcast_bulk_change(self, response):
+        """
+        Push one frame with all changes of a bulk action to the user's other
+        connections, the sender gets the same frame as the action's reply
+        """
+        await apublish(
+            f"tasks_user_{self.user.id}",
+            {
+                "type": "tasks.bulk_changed",
+                "sender": self.channel_name,
+                "frame": response,
+            },
+        )
+        return response
+
+    @action_sync_to_async
+    def _bulk_complete(self, task_ids, is_completed):
+        updated_tasks = self.task_service.bulk_set_completion(task_ids, is_completed)
+        return {"type": "tasks.bulk_updated", "data": updated_tasks, "deleted": []}
+
+    async def handle_bulk_complete(self, payload):
+        response = await self._bulk_complete(
+            payload["ids"], payload.get("is_completed", True)
+        )
+        return await self._broadcast_bulk_change(response)
+
+    @action_sync_to_async
+    def _bulk_delete(self, task_ids):
+        deleted_ids = self.task_service.bulk_delete_tasks(task_ids)
+        return {"type": "tasks.bulk_updated", "data": [], "deleted": deleted_ids}
+
+    async def handle_bulk_delete(self, payload):
+        response = await self._bulk_delete(payload["ids"])
+        return await self._broadcast_bulk_change(response)
+
+    @action_sync_to_async
+    def _bulk_move(self, task_ids, status, date):
+        updated_tasks = self.task_service.bulk_move_tasks(task_ids, status, date)
+        return {"type": "tasks.bulk_updated", "data": updated_tasks, "deleted": []}
+
+    async def handle_bulk_move(self, payload):
+        date = payload.get("date")
+        response = await self._bulk_move(
+            payload["ids"],
+            payload["status"],
+            datetime.date.fromisoformat(date) if date else None,
+        )
+        return await self._broadcast_bulk_change(response)
+
+    @action_sync_to_async
+    def _bulk_assign_project(self, task_ids, project_id):
+        updated_tasks = self.task_service.bulk_assign_project(task_ids, project_id)
+        return {"type": "tasks.bulk_updated", "data": updated_tasks, "deleted": []}
+
+    async def handle_bulk_assign_project(self, payload):
+        response = await self._bulk_assign_project(
+            payload["ids"], payload.get("project_id")
+        )
+        return await self._broadcast_bulk_change(response)
 
     # -----------------------------------------------------------------
     # to be called by external logic like from tasks, models, etc.
     # -----------------------------------------------------------------
+    async def _push(self, frame):
+        """
+        Send a frame pushed by server side code, frames arriving within
+        `NOTIFY_COALESCE_WINDOW` seconds are merged & sent together.
+        """
+        if not settings.NOTIFY_COALESCE_WINDOW:
+            await self.send_json(frame)
+            return
+        self.coalescer.add(frame)
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self._flush_pushed_frames())
+
+    async def _flush_pushed_frames(self):
+        await asyncio.sleep(settings.NOTIFY_COALESCE_WINDOW)
+        self.flush_task = None
+        async with self.send_lock:
+            await self._send_held_frames()
+
+    async def _send_held_frames(self):
+        for frame in self.coalescer.drain():
+            await self.send_json(frame)
+
+    async def _reply(self, response):
+        """
+        Send the response of an action after the frames held back by `_push`,
+        which are older than it, so they can't overwrite it on the client.
+        """
+        async with self.send_lock:
+            await self._send_held_frames()
+            await self.send_json(response)
+
     async def full_refresh(self, data):
-        await self.send_json(data)
+        await self._push(data)
 
     async def refresh_for_rec_task(self, payload):
-        await self.send_json({"type": "task.refresh_for_rec", "data": payload})
+        await self._push({"type": "task.refresh_for_rec", "data": payload})
 
     async def task_updated(self, event):
         """Handle a task update pushed from server-side code."""
-        await self.send_json(event)
+        await self._push(event)
+
+    async def tasks_status_changed(self, event):
+        """Relay tasks moved to another column by a periodic job."""
+        await self._push(
+            {
+                "type": "tasks.status_changed",
+                "status": event["status"],
+                "ids": event["ids"],
+            }
+        )
+
+    async def tasks_bulk_changed(self, event):
+        """Relay a bulk action's changes made on another connection of the user."""
+        if event["sender"] != self.channel_name:
+            await self._push(event["frame"])
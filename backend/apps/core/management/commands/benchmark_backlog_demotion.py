@@ -0,0 +1,95 @@
+import datetime
+import time
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from apps.core.models import Task
+from apps.core.services import save_task
+from apps.core.tasks import move_old_tasks_to_backlogs
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the chunked backlog demotion of "
+        "`move_old_tasks_to_backlogs_periodic` against the old per task "
+        "`save_task` loop. The loop is timed on a sample & extrapolated, it "
+        "takes hours on a full dataset. Fake data is created inside a "
+        "transaction & rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tasks",
+            type=int,
+            default=1_000_000,
+            help="number of stale candidate tasks",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=100,
+            help="number of users the tasks are spread over",
+        )
+        parser.add_argument(
+            "--loop-sample",
+            type=int,
+            default=5_000,
+            help="number of tasks the per task loop is timed on",
+        )
+
+    def handle(self, *args, **options):  # type:ignore
+        cutoff = timezone.now() - datetime.timedelta(days=15)
+        with transaction.atomic():
+            self._create_dataset(options["tasks"], options["users"], cutoff)
+
+            sample = Task.objects.filter(status=Task.ON_BOARD)[: options["loop_sample"]]
+            started = time.perf_counter()
+            for task in sample:
+                task.status = Task.BACKLOG
+                save_task(task)
+            loop_secs = time.perf_counter() - started
+            per_task = loop_secs / max(len(sample), 1)
+
+            started = time.perf_counter()
+            moved_ids_by_user = move_old_tasks_to_backlogs(cutoff)
+            chunked_secs = time.perf_counter() - started
+            moved = sum(len(ids) for ids in moved_ids_by_user.values())
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"save_task loop: {per_task * 1000:.2f}ms/task, "
+                f"~{per_task * options['tasks']:.0f}s for {options['tasks']} tasks\n"
+                f"chunked: {moved} tasks in {chunked_secs:.1f}s "
+                f"({moved / chunked_secs:.0f} tasks/s), "
+                f"{len(moved_ids_by_user)} notifications"
+            )
+        )
+
+    def _create_dataset(self, size: int, user_count: int, cutoff: datetime.datetime):
+        suffix = time.time_ns()
+        users = [
+            User.objects.create_user(  # type:ignore
+                email=f"benchmark-{suffix}-{i}@example.com", password="benchmark"
+            )
+            for i in range(user_count)
+        ]
+        batch = []
+        for i in range(size):
+            batch.append(
+                Task(
+                    user=users[i % user_count], title=f"Task {i}", status=Task.ON_BOARD
+                )
+            )
+            if len(batch) == 10_000:
+                Task.objects.bulk_create(batch)
+                batch = []
+        Task.objects.bulk_create(batch)
+        # bulk_create sets updated_at to now, age all of them past the cutoff
+        Task.objects.filter(user__in=users).update(
+            updated_at=cutoff - datetime.timedelta(days=1)
+        )
+        self.stdout.write(f"created {size} stale tasks for {user_count} users")
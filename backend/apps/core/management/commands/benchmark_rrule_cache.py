@@ -0,0 +1,89 @@
+import datetime
+import random
+import time
+from dateutil.rrule import rrulestr
+from django.core.management.base import BaseCommand
+from apps.core.recurrence import (
+    clear_rrule_cache,
+    get_occurrences,
+    get_rrule_cache_stats,
+)
+
+# rules users pick most, weighted roughly by how often they show up
+COMMON_RULES = [
+    "FREQ=DAILY",
+    "FREQ=DAILY",
+    "FREQ=DAILY",
+    "FREQ=WEEKLY;BYDAY=MO,WE,FR",
+    "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR",
+    "FREQ=WEEKLY",
+    "FREQ=DAILY;INTERVAL=2",
+    "FREQ=MONTHLY;BYMONTHDAY=1",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro benchmark of the occurrence expansion done per series by the "
+        "periodic recurrence job, parsing every rule vs the `apps.core."
+        "recurrence` LRU caches. Needs no database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--series",
+            type=int,
+            default=100_000,
+            help="number of synthetic recurrence series",
+        )
+        parser.add_argument(
+            "--start-days",
+            type=int,
+            default=30,
+            help="number of distinct days the series start on",
+        )
+
+    def handle(self, *args, **options):  # type:ignore
+        today = datetime.datetime.combine(
+            datetime.date.today(), datetime.time.min, tzinfo=datetime.timezone.utc
+        )
+        # aware starts at any minute of the day, like `Task.start_at`
+        series = [
+            (
+                random.choice(COMMON_RULES),
+                today
+                - datetime.timedelta(days=random.randrange(options["start_days"]))
+                + datetime.timedelta(minutes=random.randrange(24 * 60)),
+            )
+            for _ in range(options["series"])
+        ]
+        window = datetime.timedelta(days=20)
+
+        def uncached():
+            for rule, dtstart in series:
+                rrulestr(rule, dtstart=dtstart).between(  # type:ignore
+                    dtstart, dtstart + window, inc=True
+                )
+
+        def cached():
+            for rule, dtstart in series:
+                get_occurrences(rule, dtstart, dtstart, dtstart + window)
+
+        uncached_secs = self._time(uncached)
+        clear_rrule_cache()
+        cached_secs = self._time(cached)
+        stats = get_rrule_cache_stats()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(series)} series: rrulestr={uncached_secs:.3f}s "
+                f"cached={cached_secs:.3f}s "
+                f"speedup={uncached_secs / cached_secs:.1f}x "
+                f"occurrence hit rate={stats['occurrences']['hit_rate']:.1%}"
+            )
+        )
+
+    def _time(self, fn):
+        started = time.perf_counter()
+        fn()
+        return time.perf_counter() - started
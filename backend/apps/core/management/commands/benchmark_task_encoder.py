@@ -0,0 +1,95 @@
+import time
+import random
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+from datetime import timedelta
+from taggit.models import Tag, TaggedItem
+from apps.core.models import Task, Project
+from apps.core.serializers import TaskSerializer
+from apps.core.selectors import get_tasks_serialized
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark `TaskSerializer` against the read only `get_tasks_serialized` "
+        "encoder. Fake data is created inside a transaction & rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[1_000, 10_000, 50_000],
+            help="board sizes (number of tasks) to benchmark",
+        )
+
+    def handle(self, *args, **options):  # type:ignore
+        for size in options["sizes"]:
+            with transaction.atomic():
+                tasks = self._create_board(size)
+                serializer_secs = self._time(
+                    lambda: TaskSerializer(tasks, many=True).data
+                )
+                encoder_secs = self._time(lambda: get_tasks_serialized(tasks))
+                transaction.set_rollback(True)
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{size:>7} tasks: TaskSerializer={serializer_secs:.3f}s "
+                    f"encoder={encoder_secs:.3f}s "
+                    f"speedup={serializer_secs / encoder_secs:.1f}x"
+                )
+            )
+
+    def _time(self, fn):
+        started = time.perf_counter()
+        fn()
+        return time.perf_counter() - started
+
+    def _create_board(self, size: int):
+        user = User.objects.create_user(  # type:ignore
+            email=f"benchmark-{time.time_ns()}@example.com", password="benchmark"
+        )
+        projects = Project.objects.bulk_create(
+            [Project(user=user, title=f"Project {i}") for i in range(10)]
+        )
+        tags = [Tag.objects.get_or_create(name=f"bench-{i}")[0] for i in range(5)]
+        now = timezone.now()
+        tasks = Task.objects.bulk_create(
+            [
+                Task(
+                    user=user,
+                    title=f"Task {i}",
+                    description="benchmark task",
+                    order=i % 100,
+                    status=Task.ON_BOARD,
+                    start_at=now + timedelta(days=i % 30),
+                    end_at=now + timedelta(days=i % 30, minutes=30),
+                    duration=timedelta(minutes=30),
+                    project=random.choice(projects),
+                )
+                for i in range(size)
+            ],
+            batch_size=5_000,
+        )
+        content_type = ContentType.objects.get_for_model(Task)
+        TaggedItem.objects.bulk_create(
+            [
+                TaggedItem(content_type=content_type, object_id=task.pk, tag=tag)
+                for task in tasks
+                for tag in random.sample(tags, 2)
+            ],
+            batch_size=5_000,
+        )
+        # serializer gets the same query planned queryset as the board loader
+        return (
+            Task.objects.filter(user=user)
+            .select_related("project", "recurrence_series")
+            .prefetch_related("tags")
+        )
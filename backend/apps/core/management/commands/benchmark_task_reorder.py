@@ -0,0 +1,56 @@
+import time
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from apps.core.models import Task
+from apps.core.services import TaskService, reserve_change_seq
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark `TaskService.bulk_update_task_order` for growing column "
+        "lengths. Fake data is created inside a transaction & rolled back. "
+        "Note: SQLite splits bulk queries into batches, so query counts are "
+        "only constant on PostgreSQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[10, 200, 2_000],
+            help="column lengths (number of tasks) to benchmark",
+        )
+
+    def handle(self, *args, **options):  # type:ignore
+        for size in options["sizes"]:
+            with transaction.atomic():
+                user = User.objects.create_user(  # type:ignore
+                    email=f"benchmark-{time.time_ns()}@example.com",
+                    password="benchmark",
+                )
+                tasks = Task.objects.bulk_create(
+                    [Task(user=user, title=f"Task {i}") for i in range(size)]
+                )
+                # reverse the whole column
+                payload = [{"id": task.pk} for task in reversed(tasks)]
+                service = TaskService(user)
+                # the first write of a user creates its TaskSequence
+                reserve_change_seq(user.pk)
+
+                started = time.perf_counter()
+                with CaptureQueriesContext(connection) as ctx:
+                    service.bulk_update_task_order(payload)
+                elapsed = time.perf_counter() - started
+                transaction.set_rollback(True)
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{size:>6} tasks: queries={len(ctx.captured_queries)} "
+                    f"time={elapsed:.3f}s"
+                )
+            )
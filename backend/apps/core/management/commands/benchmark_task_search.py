@@ -0,0 +1,104 @@
+import time
+import random
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Q
+from apps.core.models import Task
+from apps.core.selectors import search_tasks_for_user_serialized
+
+User = get_user_model()
+
+WORDS = (
+    "review plan write call email fix deploy design meeting report invoice "
+    "budget release draft sprint client backlog refactor migrate research "
+    "interview onboarding roadmap feedback dentist groceries gym taxes travel "
+    "birthday laundry garden renew passport insurance newsletter podcast"
+).split()
+
+QUERIES = ["invoice", "deploy release", '"sprint review"', "passport -renew"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark full text task search (`search_tasks_for_user_serialized`) "
+        "against a naive `icontains` scan on a synthetic dataset. Needs "
+        "PostgreSQL. Fake data is created inside a transaction & rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tasks",
+            type=int,
+            default=1_000_000,
+            help="total number of synthetic tasks",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=100,
+            help="number of users the tasks are spread over",
+        )
+
+    def handle(self, *args, **options):  # type:ignore
+        if connection.vendor != "postgresql":
+            raise CommandError("Task search needs PostgreSQL")
+
+        with transaction.atomic():
+            users = self._create_dataset(options["tasks"], options["users"])
+            # statistics for the planner, as autovacuum would do on real data
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE core_task")
+
+            user = users[0]
+            for query in QUERIES:
+                fts_secs, results = self._time(
+                    lambda: search_tasks_for_user_serialized(user.pk, query)
+                )
+                term = query.strip('"').split()[0]
+                naive_secs, _ = self._time(
+                    lambda: list(
+                        Task.objects.filter(user=user)
+                        .filter(
+                            Q(title__icontains=term) | Q(description__icontains=term)
+                        )
+                        .values_list("id", flat=True)[:50]
+                    )
+                )
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"{query!r:>20}: full text={fts_secs * 1000:.1f}ms "
+                        f"({len(results)} results) "
+                        f"icontains={naive_secs * 1000:.1f}ms"
+                    )
+                )
+            transaction.set_rollback(True)
+
+    def _time(self, fn):
+        started = time.perf_counter()
+        result = fn()
+        return time.perf_counter() - started, result
+
+    def _create_dataset(self, size: int, user_count: int):
+        suffix = time.time_ns()
+        users = [
+            User.objects.create_user(  # type:ignore
+                email=f"benchmark-{suffix}-{i}@example.com", password="benchmark"
+            )
+            for i in range(user_count)
+        ]
+        batch = []
+        for i in range(size):
+            batch.append(
+                Task(
+                    user=users[i % user_count],
+                    title=" ".join(random.sample(WORDS, 3)),
+                    description=" ".join(random.choices(WORDS, k=12)),
+                )
+            )
+            if len(batch) == 10_000:
+                Task.objects.bulk_create(batch)
+                batch = []
+        Task.objects.bulk_create(batch)
+        self.stdout.write(f"created {size} tasks for {user_count} users")
+        return users
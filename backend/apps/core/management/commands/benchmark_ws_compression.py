@@ -0,0 +1,103 @@
+import datetime
+import json
+import random
+import time
+import zlib
+from django.core.management.base import BaseCommand
+from apps.core.wire_format import pack_frame, unpack_frame
+
+WORDS = (
+    "review plan write call email fix deploy design meeting report invoice "
+    "budget release draft sprint client backlog refactor migrate research"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark bytes on the wire & CPU cost of the compressed websocket "
+        "frames of `apps.core.compression` & the MessagePack frames of "
+        "`apps.core.wire_format` for `tasks.list` frames of growing boards. "
+        "Needs no database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[100, 1_000, 10_000],
+            help="board sizes (number of tasks) to benchmark",
+        )
+        parser.add_argument(
+            "--levels",
+            nargs="+",
+            type=int,
+            default=[1, 6, 9],
+            help="zlib compression levels to benchmark",
+        )
+
+    def handle(self, *args, **options):  # type:ignore
+        for size in options["sizes"]:
+            frame = {"type": "tasks.list", "data": self._board(size)}
+            json_secs, text = self._time(lambda: json.dumps(frame).encode())
+            json_decode_secs, _ = self._time(lambda: json.loads(text))
+            packed_secs, packed = self._time(lambda: pack_frame(frame))
+            unpack_secs, _ = self._time(lambda: unpack_frame(packed))
+            self.stdout.write(
+                f"{size:>6} tasks: json={len(text) / 1024:.0f}KiB "
+                f"encode={json_secs * 1000:.1f}ms "
+                f"decode={json_decode_secs * 1000:.1f}ms\n"
+                f"        msgpack={len(packed) / 1024:.0f}KiB "
+                f"encode={packed_secs * 1000:.1f}ms "
+                f"decode={unpack_secs * 1000:.1f}ms "
+                f"deflated={len(zlib.compress(packed)) / 1024:.0f}KiB"
+            )
+            for level in options["levels"]:
+                started = time.perf_counter()
+                compressed = zlib.compress(text, level)
+                compress_secs = time.perf_counter() - started
+                started = time.perf_counter()
+                zlib.decompress(compressed)
+                decompress_secs = time.perf_counter() - started
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"        level {level}: "
+                        f"deflate={len(compressed) / 1024:.0f}KiB "
+                        f"ratio={len(text) / len(compressed):.1f}x "
+                        f"compress={compress_secs * 1000:.1f}ms "
+                        f"inflate={decompress_secs * 1000:.1f}ms"
+                    )
+                )
+
+    def _time(self, fn):
+        started = time.perf_counter()
+        result = fn()
+        return time.perf_counter() - started, result
+
+    def _board(self, size: int) -> list[dict]:
+        """Tasks shaped like `get_tasks_serialized` output"""
+        today = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+        tasks = []
+        for i in range(size):
+            start_at = today + datetime.timedelta(days=i % 7, hours=i % 10)
+            tasks.append(
+                {
+                    "id": i + 1,
+                    "frontend_id": f"{random.getrandbits(64):016x}",
+                    "title": " ".join(random.sample(WORDS, 3)),
+                    "description": " ".join(random.choices(WORDS, k=12)),
+                    "order": float(i * 1024),
+                    "is_completed": i % 5 == 0,
+                    "status": "ON_BOARD",
+                    "created_at": today.isoformat(),
+                    "updated_at": today.isoformat(),
+                    "duration": "00:30:00",
+                    "start_at": start_at.isoformat(),
+                    "end_at": (start_at + datetime.timedelta(minutes=30)).isoformat(),
+                    "tags": random.sample(["work", "home", "urgent", "later"], 2),
+                    "duration_display": "30m",
+                    "project": None,
+                    "recurrence_series": None,
+                }
+            )
+        return tasks
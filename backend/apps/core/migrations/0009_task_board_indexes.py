@@ -0,0 +1,46 @@
+# Generated by Django 5.2 on 2026-10-17 00:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0008_alter_task_options_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["user", "status", "start_at", "order"],
+                name="task_user_status_start_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["recurrence_series", "start_at"], name="task_series_start_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("status", "ARCHIVED"), _negated=True),
+                fields=["updated_at"],
+                name="task_live_updated_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(
+                    ("is_completed", False),
+                    models.Q(("status", "ARCHIVED"), _negated=True),
+                ),
+                fields=["user", "start_at"],
+                name="task_open_user_start_idx",
+            ),
+        ),
+    ]
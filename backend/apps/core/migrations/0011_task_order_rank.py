@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-17 00:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0010_task_delta_sync"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="historicaltask",
+            name="order",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="task",
+            name="order",
+            field=models.FloatField(default=0),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2 on 2026-10-17 00:34
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+# keep `Task.search_vector` in sync on every write path, including bulk
+# inserts & queryset updates which bypass `save_task`
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('pg_catalog.english', coalesce(NEW.title, '')), 'A') ||
+    setweight(to_tsvector('pg_catalog.english', coalesce(NEW.description, '')), 'B')
+"""
+
+CREATE_TRIGGER_SQL = f"""
+CREATE FUNCTION core_task_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR_SQL};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_task_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, description ON core_task
+    FOR EACH ROW EXECUTE FUNCTION core_task_search_vector_update();
+
+UPDATE core_task SET search_vector = {SEARCH_VECTOR_SQL.replace("NEW.", "")};
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS core_task_search_vector_update ON core_task;
+DROP FUNCTION IF EXISTS core_task_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0011_task_order_rank"),
+        (
+            "taggit",
+            "0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx",
+        ),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="task_search_vector_idx"
+            ),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER_SQL, reverse_sql=DROP_TRIGGER_SQL),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-17 00:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0013_title_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recurrenceseries",
+            name="materialized_until",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="recurrenceseries",
+            index=models.Index(
+                fields=["materialized_until"], name="series_horizon_idx"
+            ),
+        ),
+    ]
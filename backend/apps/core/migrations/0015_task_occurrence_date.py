@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-17 01:22
+
+import datetime
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def set_occurrence_dates(apps, schema_editor):
+    """Tasks of a series were created for the (UTC) date they start on"""
+    Task = apps.get_model("core", "Task")
+    Task.objects.filter(recurrence_series__isnull=False, start_at__isnull=False).update(
+        occurrence_date=TruncDate("start_at", tzinfo=datetime.timezone.utc)
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0014_recurrence_series_horizon"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="historicaltask",
+            name="occurrence_date",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="occurrence_date",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(set_occurrence_dates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-17 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0015_task_occurrence_date"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TimezoneRollover",
+            fields=[
+                (
+                    "timezone",
+                    models.CharField(max_length=63, primary_key=True, serialize=False),
+                ),
+                ("rolled_over_through", models.DateField()),
+            ],
+        ),
+    ]
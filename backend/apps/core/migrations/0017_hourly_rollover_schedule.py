@@ -0,0 +1,47 @@
+# Generated by Django 5.2 on 2026-10-17 01:27
+
+from django.db import migrations
+from django.utils import timezone
+
+ROLLOVER_TASK = "move_yesterday_task_to_today_periodic"
+
+
+def schedule_rollover_hourly(apps, schema_editor):
+    """
+    Every zone rolls over in the first run after its local midnight, so the
+    rollover has to run hourly instead of once a day.
+    """
+    CrontabSchedule = apps.get_model("django_celery_beat", "CrontabSchedule")
+    PeriodicTask = apps.get_model("django_celery_beat", "PeriodicTask")
+    PeriodicTasks = apps.get_model("django_celery_beat", "PeriodicTasks")
+    hourly, _ = CrontabSchedule.objects.get_or_create(
+        minute="0",
+        hour="*",
+        day_of_week="*",
+        day_of_month="*",
+        month_of_year="*",
+        timezone="UTC",
+    )
+    # a schedule needs exactly one of interval, crontab, solar & clocked
+    updated = PeriodicTask.objects.filter(task=ROLLOVER_TASK).update(
+        crontab=hourly, interval=None, solar=None, clocked=None, one_off=False
+    )
+    if not updated:
+        PeriodicTask.objects.create(
+            name="Roll over yesterday's tasks", task=ROLLOVER_TASK, crontab=hourly
+        )
+    # beat reloads its schedule once this changes
+    PeriodicTasks.objects.update_or_create(
+        ident=1, defaults={"last_update": timezone.now()}
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0016_timezone_rollover"),
+        ("django_celery_beat", "0018_improve_crontab_helptext"),
+    ]
+
+    operations = [
+        migrations.RunPython(schedule_rollover_hourly, migrations.RunPython.noop),
+    ]
@@ -3,11 +3,28 @@ from taggit.managers import TaggableManager
 from django.utils.functional import cached_property
 from django.utils.duration import _get_duration_components  # type: ignore
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from simple_history.models import HistoricalRecords
 
 User = get_user_model()
 
 
+def format_duration_display(duration) -> str | None:
+    """Human readable duration of a task e.g. `1d 2h 30m`"""
+    if duration:
+        day, hours, minutes, _, _ = _get_duration_components(duration)
+        final_str = ""
+        if hours > 0:
+            final_str += f"{hours}h "
+        if minutes > 0:
+            final_str += f"{minutes}m"
+        if day > 0:
+            final_str = f"{day}d " + final_str
+        return final_str.strip()
+    return None
+
+
 class Project(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     title = models.CharField(max_length=255)
@@ -15,6 +32,16 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     history = HistoricalRecords()
 
+    class Meta:
+        indexes = [
+            # typo tolerant title autocomplete, see `autocomplete_titles_for_user`
+            GinIndex(
+                fields=["title"],
+                opclasses=["gin_trgm_ops"],
+                name="project_title_trgm_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -24,6 +51,56 @@ class RecurrenceSeries(models.Model):
     recurrence_rule = models.TextField(
         blank=True, null=True, help_text="RRULE string (RFC-5545)."
     )
+    # tasks of the series exist for occurrences up to this date
+    materialized_until = models.DateField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # periodic job picks series whose horizon runs out soon
+            models.Index(fields=["materialized_until"], name="series_horizon_idx"),
+        ]
+
+
+class TaskSequence(models.Model):
+    """
+    Per user change counter used by delta sync. Every task write stamps the
+    task with the next value, so clients can ask only for what changed after
+    the last value they saw.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="task_sequence"
+    )
+    last_value = models.PositiveBigIntegerField(default=0)
+    # tombstones up to this value were pruned, older clients need a full refresh
+    pruned_through = models.PositiveBigIntegerField(default=0)
+
+
+class TaskTombstone(models.Model):
+    """Id of a deleted task, kept around so delta sync can report the delete"""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    task_id = models.BigIntegerField()
+    change_seq = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "change_seq"], name="tombstone_user_change_seq_idx"
+            ),
+        ]
+
+
+class TimezoneRollover(models.Model):
+    """
+    Last local date the open tasks of a timezone's users were rolled over to,
+    so the hourly rollover catches up on days a run was missed.
+    """
+
+    timezone = models.CharField(max_length=63, primary_key=True)
+    # tasks starting before this local date were moved onto it
+    rolled_over_through = models.DateField()
 
 
 class Task(models.Model):
@@ -47,7 +124,8 @@ class Task(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
-    order = models.PositiveSmallIntegerField(default=0)
+    # fractional rank within a board column, see `TaskService.move_task`
+    order = models.FloatField(default=0)
     is_completed = models.BooleanField(default=False)
     status = models.CharField(
         max_length=20,
@@ -75,25 +153,57 @@ class Task(models.Model):
         blank=True,
         null=True,
     )
+    # date of the series occurrence the task was created for, kept when the
+    # task is moved so the occurrence isn't expanded again on its old date
+    occurrence_date = models.DateField(blank=True, null=True)
+    # value of the owner's `TaskSequence` at the last write, see `save_task`
+    change_seq = models.PositiveBigIntegerField(default=0)
+    # weighted title & description lexemes for full text search, maintained by
+    # the `core_task_search_vector_update` trigger (see migration 0012)
+    search_vector = SearchVectorField(null=True, editable=False)
     # keep a record of changes to this model
-    history = HistoricalRecords()
+    history = HistoricalRecords(excluded_fields=["search_vector"])
 
     class Meta:
         ordering = ["start_at", "order"]
+        indexes = [
+            # board columns: a user's tasks per status in display order
+            models.Index(
+                fields=["user", "status", "start_at", "order"],
+                name="task_user_status_start_idx",
+            ),
+            # sibling lookups of a recurring series (future/past/latest)
+            models.Index(
+                fields=["recurrence_series", "start_at"],
+                name="task_series_start_idx",
+            ),
+            # periodic jobs only scan tasks which aren't archived yet
+            models.Index(
+                fields=["updated_at"],
+                condition=~models.Q(status="ARCHIVED"),
+                name="task_live_updated_idx",
+            ),
+            # open tasks on board/calendar, used by the daily rollover
+            models.Index(
+                fields=["user", "start_at"],
+                condition=models.Q(is_completed=False) & ~models.Q(status="ARCHIVED"),
+                name="task_open_user_start_idx",
+            ),
+            # delta sync, tasks changed after a given version
+            models.Index(
+                fields=["user", "change_seq"], name="task_user_change_seq_idx"
+            ),
+            # full text search over title & description
+            GinIndex(fields=["search_vector"], name="task_search_vector_idx"),
+            # typo tolerant title autocomplete, see `autocomplete_titles_for_user`
+            GinIndex(
+                fields=["title"], opclasses=["gin_trgm_ops"], name="task_title_trgm_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
     @cached_property
     def get_duration_display(self):
-        if self.duration:
-            day, hours, minutes, _, _ = _get_duration_components(self.duration)
-            final_str = ""
-            if hours > 0:
-                final_str += f"{hours}h "
-            if minutes > 0:
-                final_str += f"{minutes}m"
-            if day > 0:
-                final_str = f"{day}d " + final_str
-            return final_str.strip()
-        return None
+        return format_duration_display(self.duration)
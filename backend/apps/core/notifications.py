@@ -0,0 +1,90 @@
+"""
+Coalescing of server pushed frames of a websocket connection.
+
+Events reach a user's `tasks_user_<id>` group from web processes & celery
+workers alike, e.g. an update of a whole series sends `refresh_for_rec_task`
+from `TaskService.update_task` & again from `regenerate_recurring_series`.
+Connections hold frames back for `NOTIFY_COALESCE_WINDOW` seconds & merge
+consecutive frames of the same kind, deduping task ids, so clients get one
+consolidated frame instead of a burst of redundant ones.
+"""
+
+# frames in & out of all coalescers of the process
+_stats = {"events_in": 0, "frames_out": 0}
+
+
+def _merge_upserts(pending: dict, frame: dict, upserts: str, deletes: str):
+    """Merge delete & upsert lists, a later delete drops an earlier upsert"""
+    deleted = set(frame[deletes])
+    pending[deletes] = list(dict.fromkeys(pending[deletes] + frame[deletes]))
+    tasks = {t["id"]: t for t in pending[upserts] if t["id"] not in deleted}
+    tasks.update((t["id"], t) for t in frame[upserts])
+    pending[upserts] = list(tasks.values())
+
+
+def _merge(pending: dict, frame: dict) -> bool:
+    """Merge `frame` into the `pending` frame of the same kind, in place"""
+    kind = frame["type"]
+    if kind != pending["type"]:
+        return False
+    if kind == "full_refresh":
+        return True
+    if kind == "task.refresh_for_rec":
+        _merge_upserts(pending["data"], frame["data"], "created", "deleted")
+        return True
+    if kind == "tasks.bulk_updated":
+        _merge_upserts(pending, frame, "data", "deleted")
+        return True
+    if kind == "tasks.status_changed" and pending["status"] == frame["status"]:
+        pending["ids"] = list(dict.fromkeys(pending["ids"] + frame["ids"]))
+        return True
+    if kind == "task_updated" and pending["data"]["id"] == frame["data"]["id"]:
+        pending["data"] = frame["data"]
+        return True
+    return False
+
+
+def _copy(frame: dict) -> dict:
+    # merges replace the lists of a pending frame but set its keys, frames may
+    # be shared with other connections of the process
+    frame = dict(frame)
+    if frame["type"] == "task.refresh_for_rec":
+        frame["data"] = dict(frame["data"])
+    return frame
+
+
+class FrameCoalescer:
+    """Pending frames of one connection, in the order they were added"""
+
+    def __init__(self):
+        self.frames: list[dict] = []
+
+    def add(self, frame: dict):
+        _stats["events_in"] += 1
+        if self.frames and self.frames[0]["type"] == "full_refresh":
+            # the client reloads everything once the refresh is flushed
+            return
+        if frame["type"] == "full_refresh":
+            self.frames = [frame]
+            return
+        # only merge into the last frame, so frames keep their order
+        if not (self.frames and _merge(self.frames[-1], frame)):
+            self.frames.append(_copy(frame))
+
+    def drain(self) -> list[dict]:
+        frames, self.frames = self.frames, []
+        _stats["frames_out"] += len(frames)
+        return frames
+
+
+def get_notification_stats() -> dict:
+    events_in, frames_out = _stats["events_in"], _stats["frames_out"]
+    return {
+        "events_in": events_in,
+        "frames_out": frames_out,
+        "coalesced_rate": 1 - frames_out / events_in if events_in else 0.0,
+    }
+
+
+def reset_notification_stats():
+    _stats.update(events_in=0, frames_out=0)
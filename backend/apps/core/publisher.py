@@ -0,0 +1,126 @@
+"""
+Publishing of realtime events to the websocket groups of users.
+
+Async code (consumers) awaits `apublish` / `apublish_many`, which send straight
+to the channel layer. Sync code (views, services, celery tasks) calls `publish`
+/ `publish_many`: once the current transaction commits, events are queued to a
+long lived event loop running in a background thread of the process, so
+channel layer connections are reused instead of spinning up a loop per event
+and the committing request doesn't wait for the channel layer.
+
+A batch of events is sent concurrently, its `group_send` calls share the
+channel layer's connection pool. If the channel layer can't be reached, or
+`REALTIME_PUBLISH_MODE` is `"celery"`, events go through the `notify_frontend`
+Celery task like before.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# seconds to wait for a batch to reach the channel layer before falling back
+PUBLISH_TIMEOUT = 5
+
+Message = tuple[str, dict]
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_pid: int | None = None
+_loop_lock = threading.Lock()
+
+
+async def apublish(group_name: str, event: dict):
+    await get_channel_layer().group_send(group_name, event)  # type:ignore
+
+
+async def apublish_many(messages: list[Message]):
+    """Send `(group_name, event)` messages concurrently"""
+    channel_layer = get_channel_layer()
+    await asyncio.gather(
+        *[
+            channel_layer.group_send(group_name, event)  # type:ignore
+            for group_name, event in messages
+        ]
+    )
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _loop_pid
+    with _loop_lock:
+        # threads don't survive a fork, prefork celery children need their own
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            started = threading.Event()
+            _loop.call_soon(started.set)
+            threading.Thread(
+                target=_loop.run_forever, name="realtime-publisher", daemon=True
+            ).start()
+            started.wait(timeout=PUBLISH_TIMEOUT)
+        return _loop
+
+
+def send_direct(messages: list[Message]):
+    """Send `messages` from the long lived publisher loop & wait for them"""
+    future = asyncio.run_coroutine_threadsafe(apublish_many(messages), _get_loop())
+    try:
+        future.result(timeout=PUBLISH_TIMEOUT)
+    except Exception:
+        future.cancel()
+        raise
+
+
+def send_with_celery(messages: list[Message]):
+    from .tasks import notify_frontend
+
+    for group_name, event in messages:
+        notify_frontend.delay(group_name, event)  # type: ignore
+
+
+async def _apublish_or_fall_back(messages: list[Message]):
+    try:
+        await asyncio.wait_for(apublish_many(messages), PUBLISH_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Direct publish of {len(messages)} events failed: {e}")
+        # queueing the celery tasks talks to the broker, keep it off the loop
+        await asyncio.get_running_loop().run_in_executor(
+            None, send_with_celery, messages
+        )
+
+
+def send_now(messages: list[Message]):
+    """
+    Queue `messages` to the publisher loop without waiting for them to be sent.
+
+    Only if the loop isn't running they're sent from the calling thread, falls
+    back to the `notify_frontend` Celery task.
+    """
+    if settings.REALTIME_PUBLISH_MODE == "direct":
+        loop = _get_loop()
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(_apublish_or_fall_back(messages), loop)
+            return
+        try:
+            async_to_sync(apublish_many)(messages)
+            return
+        except Exception as e:
+            logger.warning(f"Direct publish of {len(messages)} events failed: {e}")
+
+    send_with_celery(messages)
+
+
+def publish_many(messages: list[Message]):
+    """Send `(group_name, event)` messages once the current transaction commits"""
+    if messages:
+        transaction.on_commit(lambda: send_now(messages))
+
+
+def publish(group_name: str, event: dict):
+    """Send `event` to `group_name` once the current transaction commits"""
+    publish_many([(group_name, event)])
@@ -0,0 +1,105 @@
+"""
+Process local caches of parsed recurrence rules.
+
+Many series share the same rule (`FREQ=DAILY`, `FREQ=WEEKLY;BYDAY=MO,WE,FR`)
+& start on the same days, so parsed rules & their occurrence windows are kept
+in LRU caches instead of running `rrulestr` for every series again. Cache keys
+are normalized to midnight of the start day, see `get_occurrences`.
+"""
+
+import datetime
+from functools import lru_cache
+from dateutil.rrule import rrulestr
+
+RRULE_CACHE_SIZE = 1024
+OCCURRENCES_CACHE_SIZE = 4096
+
+
+# rule parts which make occurrences depend on the time of day of `dtstart`
+TIME_OF_DAY_RULE_PARTS = (
+    "FREQ=HOURLY",
+    "FREQ=MINUTELY",
+    "FREQ=SECONDLY",
+    "BYHOUR",
+    "BYMINUTE",
+    "BYSECOND",
+    "UNTIL",
+    "DTSTART",
+)
+
+
+def validate_rule(rule: str):
+    """Raises `ValueError` for invalid rules, nothing is cached"""
+    rrulestr(rule)
+
+
+@lru_cache(maxsize=RRULE_CACHE_SIZE)
+def get_rrule(rule: str, dtstart: datetime.datetime | None = None):
+    """
+    Parsed `rule` starting at `dtstart`. Raises `ValueError` for invalid
+    rules. The returned rule is shared, don't modify it.
+    """
+    return rrulestr(rule, dtstart=dtstart)
+
+
+@lru_cache(maxsize=OCCURRENCES_CACHE_SIZE)
+def _get_occurrences(
+    rule: str,
+    dtstart: datetime.datetime,
+    after: datetime.datetime,
+    before: datetime.datetime,
+) -> tuple[datetime.datetime, ...]:
+    return tuple(get_rrule(rule, dtstart).between(after, before, inc=True))  # type:ignore
+
+
+def _midnight(dt: datetime.datetime) -> datetime.datetime:
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def get_occurrences(
+    rule: str,
+    dtstart: datetime.datetime,
+    after: datetime.datetime,
+    before: datetime.datetime,
+) -> tuple[datetime.datetime, ...]:
+    """
+    Occurrences of `rule` from `dtstart` within `[after, before]`. Rules
+    repeating by days or longer are expanded from midnight of `dtstart` over
+    whole days & shifted by its time of day, so series starting on the same
+    day share cache entries whatever time they start at.
+    """
+    if any(part in rule.upper() for part in TIME_OF_DAY_RULE_PARTS):
+        return _get_occurrences(rule, dtstart, after, before)
+    time_of_day = dtstart - _midnight(dtstart)
+    one_day = datetime.timedelta(days=1)
+    # whole days around the window, covering any time of day
+    day_occurrences = _get_occurrences(
+        rule, _midnight(dtstart), _midnight(after) - one_day, _midnight(before)
+    )
+    return tuple(
+        occurrence
+        for occurrence in (dt + time_of_day for dt in day_occurrences)
+        if after <= occurrence <= before
+    )
+
+
+def _stats(cache_info) -> dict:
+    total = cache_info.hits + cache_info.misses
+    return {
+        "hits": cache_info.hits,
+        "misses": cache_info.misses,
+        "hit_rate": cache_info.hits / total if total else 0.0,
+        "size": cache_info.currsize,
+    }
+
+
+def get_rrule_cache_stats() -> dict:
+    return {
+        "rules": _stats(get_rrule.cache_info()),
+        "occurrences": _stats(_get_occurrences.cache_info()),
+    }
+
+
+def clear_rrule_cache():
+    get_rrule.cache_clear()
+    _get_occurrences.cache_clear()
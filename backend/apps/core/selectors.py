@@ -1,24 +1,139 @@
+import base64
+import binascii
+import datetime
+import json
 import logging
-from channels.db import database_sync_to_async
-from .models import Task, RecurrenceSeries
+from .models import (
+    Task,
+    Project,
+    RecurrenceSeries,
+    TaskSequence,
+    TaskTombstone,
+    format_duration_display,
+)
 from .filters import TaskFilter, TASK_FILTER_FIELDS
-from .serializers import TaskSerializer
+from .recurrence import get_occurrences
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce, TruncDate
 from django.db.models.query import QuerySet
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.duration import duration_string
+from taggit.models import TaggedItem
 
 logger = logging.getLogger(__name__)
 
 
-@database_sync_to_async
-def get_filtered_tasks_for_user_serialized(user_id: int | str, filters: dict):
-    """Synchronous method to fetch and filter tasks"""
+def _encode_datetime(value, tz):
+    """Same output as DRF's `DateTimeField` with the default ISO-8601 format"""
+    if not value:
+        return None
+    value = value.astimezone(tz).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def get_tasks_serialized(tasks: QuerySet[Task]) -> list[dict]:
+    """
+    Read only fast path of `TaskSerializer(tasks, many=True).data`.
+
+    Builds the task dicts straight from `.values()` rows, tags & projects are
+    loaded once for the whole queryset, so it runs at most 3 queries & skips the
+    per field DRF dispatch. The output must stay identical to `TaskSerializer`.
+    """
+    tz = timezone.get_current_timezone()
+    rows = list(
+        tasks.values(
+            "id",
+            "frontend_id",
+            "title",
+            "description",
+            "order",
+            "is_completed",
+            "status",
+            "created_at",
+            "updated_at",
+            "duration",
+            "start_at",
+            "end_at",
+            "project_id",
+            "recurrence_series_id",
+            "recurrence_series__recurrence_rule",
+        )
+    )
+    if not rows:
+        return []
+
+    tags_map: dict[int, list[str]] = {}
+    tagged_items = (
+        TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(Task),
+            object_id__in=tasks.values("id"),
+        )
+        # same order as `TaskSerializer.tags`
+        .order_by("tag__name")
+        .values_list("object_id", "tag__name")
+    )
+    for task_id, tag_name in tagged_items:
+        tags_map.setdefault(task_id, []).append(tag_name)
+
+    projects_map = {
+        project["id"]: {
+            "id": project["id"],
+            "title": project["title"],
+            "description": project["description"],
+            "created_at": _encode_datetime(project["created_at"], tz),
+        }
+        for project in Project.objects.filter(
+            id__in={row["project_id"] for row in rows if row["project_id"]}
+        ).values("id", "title", "description", "created_at")
+    }
+
+    return [
+        {
+            "id": row["id"],
+            "frontend_id": row["frontend_id"],
+            "title": row["title"],
+            "description": row["description"],
+            "order": row["order"],
+            "is_completed": row["is_completed"],
+            "status": row["status"],
+            "created_at": _encode_datetime(row["created_at"], tz),
+            "updated_at": _encode_datetime(row["updated_at"], tz),
+            "duration": duration_string(row["duration"])
+            if row["duration"] is not None
+            else None,
+            "start_at": _encode_datetime(row["start_at"], tz),
+            "end_at": _encode_datetime(row["end_at"], tz),
+            "tags": tags_map.get(row["id"], []),
+            "duration_display": format_duration_display(row["duration"]),
+            "project": projects_map.get(row["project_id"]),
+            "recurrence_series": {
+                "id": row["recurrence_series_id"],
+                "recurrence_rule": row["recurrence_series__recurrence_rule"],
+            }
+            if row["recurrence_series_id"]
+            else None,
+        }
+        for row in rows
+    ]
+
+
+def get_filtered_tasks_for_user(user_id: int | str, filters: dict) -> QuerySet[Task]:
+    """Validate `filters` with `TaskFilter` & return the matching tasks of a user"""
     tasks = Task.objects.filter(user_id=user_id)
     filterset = TaskFilter(filters, queryset=tasks)
 
     if filterset.is_valid():
-        tasks = filterset.qs
-        logger.info(f"Found {tasks.count()} tasks for user_id={user_id}")
-        return TaskSerializer(tasks, many=True).data
+        return filterset.qs
 
     # Extract structured error information to avoid HTML in messages
     error_dict = filterset.errors.get_json_data()
@@ -38,6 +153,239 @@ def get_filtered_tasks_for_user_serialized(user_id: int | str, filters: dict):
     )
 
 
+def get_filtered_tasks_for_user_serialized(user_id: int | str, filters: dict):
+    """Synchronous method to fetch and filter tasks"""
+    tasks_data = get_tasks_serialized(get_filtered_tasks_for_user(user_id, filters))
+    logger.info(f"Found {len(tasks_data)} tasks for user_id={user_id}")
+    return tasks_data
+
+
+# ---------------------------------------------------------------------------
+# Keyset pagination of tasks ordered by (start_at, order, id)
+# ---------------------------------------------------------------------------
+TASKS_PAGE_SIZE = 200
+MAX_TASKS_PAGE_SIZE = 1000
+
+
+def encode_task_cursor(task_data: dict) -> str:
+    """Opaque cursor pointing right after the given serialized task"""
+    key = [task_data["start_at"], task_data["order"], task_data["id"]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_task_cursor(cursor: str) -> tuple[datetime.datetime | None, float, int]:
+    try:
+        start_at, order, task_id = json.loads(base64.urlsafe_b64decode(cursor))
+        parsed_start_at = parse_datetime(start_at) if start_at else None
+        if start_at and parsed_start_at is None:
+            raise ValueError(f"invalid start_at: {start_at}")
+        return parsed_start_at, float(order), int(task_id)
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _after_task_cursor_q(start_at, order: float, task_id: int) -> Q:
+    """
+    Tasks coming after the cursor position. Tasks without `start_at` are
+    sorted last, so they come after every scheduled task
+    """
+    after_in_same_start = Q(order__gt=order) | Q(order=order, id__gt=task_id)
+    if start_at is None:
+        return Q(start_at__isnull=True) & after_in_same_start
+    return (
+        Q(start_at__gt=start_at)
+        | (Q(start_at=start_at) & after_in_same_start)
+        | Q(start_at__isnull=True)
+    )
+
+
+def get_filtered_tasks_page_for_user_serialized(
+    user_id: int | str,
+    filters: dict,
+    cursor: str | None = None,
+    page_size: int = TASKS_PAGE_SIZE,
+) -> tuple[list[dict], str | None]:
+    """
+    One page of the filtered tasks of a user & the cursor of the next page,
+    `None` when this is the last page.
+    """
+    tasks = get_filtered_tasks_for_user(user_id, filters).order_by(
+        F("start_at").asc(nulls_last=True), "order", "id"
+    )
+    if cursor:
+        tasks = tasks.filter(_after_task_cursor_q(*decode_task_cursor(cursor)))
+
+    # fetch one extra task to know if there is a next page
+    tasks_data = get_tasks_serialized(tasks[: page_size + 1])
+    next_cursor = None
+    if len(tasks_data) > page_size:
+        tasks_data = tasks_data[:page_size]
+        next_cursor = encode_task_cursor(tasks_data[-1])
+    logger.info(
+        f"Found {len(tasks_data)} tasks for user_id={user_id} page_size={page_size}"
+    )
+    return tasks_data, next_cursor
+
+
+# ---------------------------------------------------------------------------
+# Delta sync, tasks changed after a `TaskSequence` value
+# ---------------------------------------------------------------------------
+def get_task_change_seq(user_id: int | str) -> int:
+    """Latest change sequence value of a user, the version of their board"""
+    sequence = TaskSequence.objects.filter(user_id=user_id).first()
+    return sequence.last_value if sequence else 0
+
+
+def get_tasks_changed_since_serialized(user_id: int | str, version: int) -> dict | None:
+    """
+    Tasks created/updated & ids of tasks deleted after `version`, along with
+    the new version. Returns `None` when the tombstones the client needs have
+    been pruned already, in that case the client has to do a full fetch.
+    """
+    sequence = TaskSequence.objects.filter(user_id=user_id).first()
+    if not sequence:
+        return {"data": [], "deleted": [], "version": 0}
+    if version < sequence.pruned_through:
+        return None
+
+    # anything written after reading the version is sent again on next sync
+    tasks_data = get_tasks_serialized(
+        Task.objects.filter(user_id=user_id, change_seq__gt=version)
+    )
+    deleted_ids = list(
+        TaskTombstone.objects.filter(
+            user_id=user_id, change_seq__gt=version
+        ).values_list("task_id", flat=True)
+    )
+    logger.info(
+        f"Delta sync for user_id={user_id} since version={version}: "
+        f"{len(tasks_data)} changed, {len(deleted_ids)} deleted"
+    )
+    return {"data": tasks_data, "deleted": deleted_ids, "version": sequence.last_value}
+
+
+SEARCH_RESULTS_LIMIT = 50
+MAX_SEARCH_RESULTS_LIMIT = 200
+
+
+def search_tasks_for_user_serialized(
+    user_id: int | str, query: str, limit: int = SEARCH_RESULTS_LIMIT
+) -> list[dict]:
+    """
+    Full text search over title & description of a user's tasks, best
+    matches first. `query` accepts web search syntax (`"exact phrase"`, `or`,
+    `-excluded`) & matches through the GIN indexed `Task.search_vector`.
+    Raises `ValueError` for an empty query or an invalid limit.
+    """
+    query = (query or "").strip()
+    if not query:
+        raise ValueError("Search query must not be empty")
+    limit = int(limit)
+    if not 0 < limit <= MAX_SEARCH_RESULTS_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_SEARCH_RESULTS_LIMIT}")
+
+    search_query = SearchQuery(query, search_type="websearch", config="english")
+    task_ids = list(
+        Task.objects.filter(user_id=user_id, search_vector=search_query)
+        .annotate(rank=SearchRank(F("search_vector"), search_query))
+        .order_by("-rank", "-updated_at", "-id")
+        .values_list("id", flat=True)[:limit]
+    )
+    tasks_data = {
+        t["id"]: t for t in get_tasks_serialized(Task.objects.filter(id__in=task_ids))
+    }
+    logger.info(
+        f"Task search for user_id={user_id} query={query!r}: {len(task_ids)} results"
+    )
+    return [tasks_data[task_id] for task_id in task_ids]
+
+
+def get_projects_for_user(user_id: int | str) -> QuerySet[Project]:
+    """Projects owned by a user, the only ones they may see or assign"""
+    return Project.objects.filter(user_id=user_id)
+
+
+AUTOCOMPLETE_LIMIT = 10
+# trigrams of shorter queries match almost anything, so those match by prefix
+MIN_TRIGRAM_QUERY_LENGTH = 3
+
+
+def _autocomplete_titles(queryset: QuerySet, query: str, limit: int) -> list[dict]:
+    if len(query) < MIN_TRIGRAM_QUERY_LENGTH:
+        queryset = queryset.filter(title__istartswith=query).order_by("title")
+    else:
+        # `%>` is served by the title trigram GIN index
+        queryset = (
+            queryset.filter(title__trigram_word_similar=query)
+            .annotate(similarity=TrigramWordSimilarity(query, "title"))
+            .order_by("-similarity", "title")
+        )
+    return list(queryset.values("id", "title")[:limit])
+
+
+def autocomplete_titles_for_user(
+    user_id: int | str, query: str, limit: int = AUTOCOMPLETE_LIMIT
+) -> dict:
+    """
+    Typo tolerant title matches for quick add & project pickers, best first.
+    Archived tasks are left out. Returns `{"tasks": [...], "projects": [...]}`
+    of `{"id", "title"}` dicts.
+    """
+    query = (query or "").strip()
+    if not query:
+        return {"tasks": [], "projects": []}
+    tasks = Task.objects.filter(user_id=user_id).exclude(status=Task.ARCHIVED)
+    return {
+        "tasks": _autocomplete_titles(tasks, query, limit),
+        "projects": _autocomplete_titles(get_projects_for_user(user_id), query, limit),
+    }
+
+
+# the board shows tasks of these statuses together, in a column per local day
+BOARD_COLUMN_STATUSES = [Task.ON_BOARD, Task.ON_CAL]
+
+
+def get_column_tasks(task: Task) -> QuerySet[Task]:
+    """
+    Tasks sharing the board column of `task`, in order: board & calendar tasks
+    starting on the same day in the user's timezone, like the board groups
+    them. Tasks of other statuses only share a column with their own status.
+    """
+    tasks = Task.objects.filter(user_id=task.user_id)
+    if task.status in BOARD_COLUMN_STATUSES:
+        tasks = tasks.filter(status__in=BOARD_COLUMN_STATUSES)
+    else:
+        tasks = tasks.filter(status=task.status)
+    if task.start_at:
+        tz = task.user.timezone
+        day_start = datetime.datetime.combine(
+            task.start_at.astimezone(tz).date(), datetime.time.min, tzinfo=tz
+        )
+        tasks = tasks.filter(
+            start_at__gte=day_start,
+            start_at__lt=datetime.datetime.combine(
+                day_start.date() + datetime.timedelta(days=1),
+                datetime.time.min,
+                tzinfo=tz,
+            ),
+        )
+    else:
+        tasks = tasks.filter(start_at__isnull=True)
+    return tasks.order_by("order", "id")
+
+
+def get_series_tasks_on_dates(series_id: int, dates: list) -> QuerySet[Task]:
+    """
+    Tasks of a series taking `dates`, a moved task keeps taking the date of
+    the occurrence it was created for. Annotated with `taken_date`
+    """
+    return (
+        Task.objects.filter(recurrence_series_id=series_id)
+        .annotate(taken_date=Coalesce("occurrence_date", TruncDate("start_at")))
+        .filter(taken_date__in=dates)
+    )
+
+
 def get_future_siblings(task: Task) -> QuerySet[Task]:
     return Task.objects.filter(
         recurrence_series=task.recurrence_series,
@@ -58,3 +406,129 @@ def get_all_task_from_series(series: RecurrenceSeries) -> QuerySet[Task]:
 
 def get_latest_task_of_series(series: RecurrenceSeries) -> Task | None:
     return get_all_task_from_series(series).order_by("-start_at").first()
+
+
+# ---------------------------------------------------------------------------
+# Virtual recurring occurrences, see `settings.VIRTUAL_RECURRENCE`
+# ---------------------------------------------------------------------------
+VIRTUAL_TASK_ID_PREFIX = "rec"
+
+
+def make_virtual_task_id(series_id: int, date: datetime.date) -> str:
+    return f"{VIRTUAL_TASK_ID_PREFIX}-{series_id}-{date.isoformat()}"
+
+
+def parse_virtual_task_id(task_id) -> tuple[int, datetime.date] | None:
+    """`(series_id, date)` of a virtual occurrence id, `None` for real task ids"""
+    if not isinstance(task_id, str) or not task_id.startswith(
+        f"{VIRTUAL_TASK_ID_PREFIX}-"
+    ):
+        return None
+    try:
+        _, series_id, date = task_id.split("-", 2)
+        return int(series_id), datetime.date.fromisoformat(date)
+    except ValueError:
+        raise ValueError(f"Invalid virtual task id: {task_id}")
+
+
+def _virtual_occurrences_range(filters: dict):
+    range_start = parse_datetime(filters.get("start_at_after") or "")
+    range_end = parse_datetime(filters.get("start_at_before") or "")
+    if not range_start:
+        range_start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    if not range_end:
+        range_end = range_start + datetime.timedelta(
+            days=settings.VIRTUAL_RECURRENCE_DAYS_AHEAD
+        )
+    # rules run from an aware `dtstart`, so the range has to be aware too
+    if timezone.is_naive(range_start):
+        range_start = timezone.make_aware(range_start)
+    if timezone.is_naive(range_end):
+        range_end = timezone.make_aware(range_end)
+    return range_start, range_end
+
+
+def get_virtual_occurrences_serialized(user_id: int | str, filters: dict) -> list[dict]:
+    """
+    Occurrences of the user's recurring series within the `start_at` range of
+    `filters` which have no task yet, computed from the series rule. Each is a
+    copy of the series' latest task (the template) moved to the occurrence
+    date, with a virtual id (see `make_virtual_task_id`) & `"virtual": True`.
+    """
+    range_start, range_end = _virtual_occurrences_range(filters)
+    series_tasks = (
+        Task.objects.filter(user_id=user_id, recurrence_series__isnull=False)
+        .exclude(recurrence_series__recurrence_rule__isnull=True)
+        .exclude(recurrence_series__recurrence_rule="")
+        .order_by(F("start_at").asc(nulls_first=True))
+        .values_list("recurrence_series_id", "id", "start_at", "occurrence_date")
+    )
+    # the rule runs from the first task of a series, the latest is the template
+    first_start_by_series: dict[int, datetime.datetime] = {}
+    template_id_by_series: dict[int, int] = {}
+    taken_dates: set[tuple[int, datetime.date]] = set()
+    for series_id, task_id, start_at, occurrence_date in series_tasks:
+        # moved (even undated) tasks take the date they were created for
+        if occurrence_date:
+            taken_dates.add((series_id, occurrence_date))
+        if start_at is None:
+            continue
+        first_start_by_series.setdefault(series_id, start_at)
+        template_id_by_series[series_id] = task_id
+        taken_dates.add((series_id, occurrence_date or start_at.date()))
+    if not template_id_by_series:
+        return []
+
+    # project & tag filters apply to the templates, dates to the occurrences
+    template_filters = {
+        k: v for k, v in filters.items() if not k.startswith("start_at")
+    }
+    templates = get_tasks_serialized(
+        get_filtered_tasks_for_user(user_id, template_filters).filter(
+            id__in=template_id_by_series.values()
+        )
+    )
+
+    tz = timezone.get_current_timezone()
+    occurrences = []
+    for template in templates:
+        series_id = template["recurrence_series"]["id"]
+        template_start = parse_datetime(template["start_at"])
+        template_end = parse_datetime(template["end_at"] or "")
+        try:
+            dates = [
+                dt.date()
+                for dt in get_occurrences(
+                    template["recurrence_series"]["recurrence_rule"],
+                    first_start_by_series[series_id],
+                    range_start,
+                    range_end,
+                )
+            ]
+        except (ValueError, TypeError) as e:
+            logger.error(f"Can't expand recurrence series_id={series_id}: {e}")
+            continue
+        for date in dates:
+            if (series_id, date) in taken_dates:
+                continue
+            # keep the template's time of day & duration
+            start_at = template_start.replace(  # type:ignore
+                year=date.year, month=date.month, day=date.day
+            )
+            end_at = template_end and start_at + (template_end - template_start)  # type:ignore
+            occurrences.append(
+                {
+                    **template,
+                    "id": make_virtual_task_id(series_id, date),
+                    "frontend_id": None,
+                    "is_completed": False,
+                    "status": Task.ON_BOARD,
+                    "start_at": _encode_datetime(start_at, tz),
+                    "end_at": _encode_datetime(end_at, tz),
+                    "virtual": True,
+                }
+            )
+    logger.info(
+        f"Expanded {len(occurrences)} virtual occurrences for user_id={user_id}"
+    )
+    return occurrences
@@ -1,8 +1,8 @@
 from rest_framework import serializers
 from .models import Task, Project, RecurrenceSeries
-from taggit.serializers import TagListSerializerField, TaggitSerializer
+from taggit.serializers import TagList, TagListSerializerField, TaggitSerializer
 from drf_writable_nested.serializers import WritableNestedModelSerializer
-from dateutil.rrule import rrulestr
+from .recurrence import validate_rule
 from datetime import timedelta
 import logging
 
@@ -17,7 +17,7 @@ class RecurrenceSeriesSerializer(serializers.ModelSerializer):
     def validate_recurrence_rule(self, value):
         if value:
             try:
-                rrulestr(value)
+                validate_rule(value)
                 logger.info(f"Valid recurrence rule: rule={value}")
             except Exception as e:
                 logger.error(f"Invalid recurrence rule '{value}': {e}")
@@ -42,8 +42,17 @@ class ProjectSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
+class SortedTagListSerializerField(TagListSerializerField):
+    def to_representation(self, value):
+        # same order as `selectors.get_tasks_serialized`, sorted here instead of
+        # with `order_by` so prefetched tags don't query again for every task
+        if not isinstance(value, (TagList, list)):
+            value = sorted(tag.name for tag in value.all())
+        return super().to_representation(value)
+
+
 class TaskSerializer(TaggitSerializer, WritableNestedModelSerializer):
-    tags = TagListSerializerField(required=False)
+    tags = SortedTagListSerializerField(required=False)
     duration_display = serializers.SerializerMethodField()
     project = ProjectSerializer(read_only=True)
     project_id = serializers.PrimaryKeyRelatedField(
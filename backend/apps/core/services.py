@@ -1,14 +1,28 @@
 """All DB write operations for apps.core.model will be here"""
 
 import datetime
-from .models import Task, Project
+from .models import Task, Project, RecurrenceSeries, TaskSequence, TaskTombstone
+from .cache import invalidate_board_cache
+from .publisher import publish
 from .serializers import TaskSerializer
 from logging import getLogger
-from django.http import HttpRequest
+from django.http import Http404, HttpRequest
+from django.utils import timezone
 from django.shortcuts import get_object_or_404
-from .selectors import get_future_siblings, get_past_siblings
+from .selectors import (
+    get_column_tasks,
+    get_future_siblings,
+    get_past_siblings,
+    get_series_tasks_on_dates,
+    get_tasks_serialized,
+    parse_virtual_task_id,
+)
 from django.db import transaction
-from django.db import IntegrityError
+from django.db.models import F
+from django.db.models.query import QuerySet
+from django.contrib.contenttypes.models import ContentType
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
+from taggit.models import Tag, TaggedItem
 
 logger = getLogger(__name__)
 
@@ -23,16 +37,162 @@ def update_task_with_new_values(task: Task, updated_task: Task):
     return save_task(task)
 
 
+def reserve_change_seq(user_id: int) -> int:
+    """
+    Bump the user's `TaskSequence` & return the new value. The row stays locked
+    until the surrounding transaction commits, so a user's changes become
+    visible in sequence order & delta sync can't skip one.
+    Cached boards of the user are dropped once the transaction commits.
+    """
+    with transaction.atomic():
+        sequence, _ = TaskSequence.objects.select_for_update().get_or_create(
+            user_id=user_id
+        )
+        sequence.last_value += 1
+        sequence.save(update_fields=["last_value"])
+        invalidate_board_cache(user_id)
+    return sequence.last_value
+
+
 def save_task(task: Task) -> Task:
     """
     Use this save method always when saving a task for
     post save task operations
     """
     # add more checks here like updating gcal
-    task.save()
+    with transaction.atomic():
+        task.change_seq = reserve_change_seq(task.user_id)  # type:ignore
+        task.save()
     return task
 
 
+def delete_tasks(tasks: QuerySet[Task]) -> list[int]:
+    """
+    Use this method always when deleting tasks, it leaves a `TaskTombstone`
+    behind so delta sync can tell clients about the delete.
+    Returns the deleted task ids
+    """
+    with transaction.atomic():
+        task_ids_by_user: dict[int, list[int]] = {}
+        for task_id, user_id in tasks.values_list("id", "user_id"):
+            task_ids_by_user.setdefault(user_id, []).append(task_id)
+        tombstones = []
+        for user_id, task_ids in task_ids_by_user.items():
+            change_seq = reserve_change_seq(user_id)
+            tombstones += [
+                TaskTombstone(user_id=user_id, task_id=task_id, change_seq=change_seq)
+                for task_id in task_ids
+            ]
+        TaskTombstone.objects.bulk_create(tombstones)
+        deleted_ids = [t.task_id for t in tombstones]
+        Task.objects.filter(id__in=deleted_ids).delete()
+    return deleted_ids
+
+
+def touch_tasks(tasks: QuerySet[Task], user_id: int) -> int:
+    """
+    Stamp a new change sequence on tasks of a user which are about to be
+    changed by a bulk SQL update that bypasses `save_task`
+    """
+    return tasks.update(change_seq=reserve_change_seq(user_id))
+
+
+def get_or_create_tags(names: set[str]) -> dict[str, Tag]:
+    """
+    Resolve tag names to `Tag`s with a fixed number of queries, missing tags
+    are created in bulk. Returns tags by name
+    """
+    tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing_names = names - set(tags)
+    if missing_names:
+        Tag.objects.bulk_create(
+            [Tag(name=name, slug=Tag().slugify(name)) for name in missing_names],
+            ignore_conflicts=True,
+        )
+        tags.update(
+            (tag.name, tag) for tag in Tag.objects.filter(name__in=missing_names)
+        )
+        # slug clashed with an existing tag, let taggit pick a free slug
+        for name in missing_names - set(tags):
+            tags[name], _ = Tag.objects.get_or_create(name=name)
+    return tags
+
+
+# spacing between ranks of neighbouring tasks after a column is rebalanced
+RANK_STEP = 1024.0
+# once neighbours get closer than this, the column is rebalanced on the move
+MIN_RANK_GAP = 1e-6
+
+
+def _rank_between(before_rank: float | None, after_rank: float | None) -> float:
+    if before_rank is None and after_rank is None:
+        return RANK_STEP
+    if before_rank is None:
+        return after_rank - RANK_STEP  # type:ignore
+    if after_rank is None:
+        return before_rank + RANK_STEP
+    return (before_rank + after_rank) / 2
+
+
+def rebalance_column_ranks(task: Task, before_id=None, after_id=None) -> int:
+    """
+    Spread ranks of the tasks in the board column of `task` evenly again,
+    keeping their current order. With `before_id` & `after_id`, `task` is put
+    between these neighbours first. Returns number of rebalanced tasks
+    """
+    with transaction.atomic():
+        # the sequence is locked before task rows, in the same order as
+        # `save_task`, so concurrent writers can't deadlock each other
+        change_seq = reserve_change_seq(task.user_id)  # type:ignore
+        column_tasks = list(get_column_tasks(task).select_for_update())
+        if before_id is not None and after_id is not None:
+            # neighbours sharing a rank may be ordered either way by id
+            moved = {t.pk: t for t in column_tasks if t.pk in (task.pk, after_id)}
+            column_tasks = [t for t in column_tasks if t.pk not in moved]
+            idx = next(i for i, t in enumerate(column_tasks) if t.pk == before_id)
+            column_tasks[idx + 1 : idx + 1] = [moved[task.pk], moved[after_id]]
+        for idx, column_task in enumerate(column_tasks, start=1):
+            column_task.order = idx * RANK_STEP
+            column_task.change_seq = change_seq
+        Task.objects.bulk_update(column_tasks, ["order", "change_seq"])
+    logger.info(
+        f"Rebalanced ranks of {len(column_tasks)} tasks in column of task_id={task.pk}"
+    )
+    return len(column_tasks)
+
+
+def materialize_occurrence(user, task_id) -> int:
+    """
+    Create the task of a virtual recurring occurrence (see
+    `selectors.get_virtual_occurrences_serialized`) & return its id, so it
+    can be changed like any task. Real task ids are returned as they are.
+    """
+    parsed = parse_virtual_task_id(task_id)
+    if parsed is None:
+        return task_id
+    series_id, date = parsed
+    template = (
+        Task.objects.filter(user=user, recurrence_series_id=series_id)
+        .exclude(start_at=None)
+        .order_by(F("start_at").desc(nulls_last=True))
+        .first()
+    )
+    if not template:
+        raise Http404(f"No recurring series matches the given id: {series_id}")
+    created = generate_rec_tasks_for_parent(template, [date])
+    # nothing is created when a concurrent request materialized it first
+    task = (
+        created[0] if created else get_series_tasks_on_dates(series_id, [date]).first()
+    )
+    if task is None:
+        raise Http404(f"No occurrence of series {series_id} on {date}")
+    logger.info(
+        f"Materialized occurrence: virtual_id={task_id} task_id={task.pk}\
+        by user_id={user.id}"
+    )
+    return task.pk
+
+
 class TaskService:
     def __init__(self, user):
         self.user = user
@@ -47,6 +207,64 @@ class TaskService:
             return serializer.data, True
         return serializer.errors, False
 
+    def create_tasks(self, data: list[dict], post_request: HttpRequest):
+        """
+        Validate & create many tasks at once: tasks, their recurrence series,
+        tags & history rows are each inserted in bulk. All or none of the
+        tasks are created.
+        """
+        serializer = TaskSerializer(
+            data=data, many=True, context={"request": post_request}
+        )
+        if not serializer.is_valid():
+            return serializer.errors, False
+
+        with transaction.atomic():
+            change_seq = reserve_change_seq(self.user.id)
+            validated_tasks = []
+            for validated_data in serializer.validated_data:  # type:ignore
+                validated_data = dict(validated_data)
+                validated_data.pop("user", None)
+                tag_names = validated_data.pop("tags", [])
+                series_data = validated_data.pop("recurrence_series", None)
+                task = Task(user=self.user, change_seq=change_seq, **validated_data)
+                validated_tasks.append((task, tag_names, series_data))
+
+            series_tasks = [
+                (task, RecurrenceSeries(**series_data))
+                for task, _, series_data in validated_tasks
+                if series_data
+            ]
+            RecurrenceSeries.objects.bulk_create([s for _, s in series_tasks])
+            for task, series in series_tasks:
+                task.recurrence_series = series
+
+            tasks = bulk_create_with_history(
+                [task for task, _, _ in validated_tasks],
+                Task,
+                default_user=self.user,
+            )
+
+            tags = get_or_create_tags(
+                {name for _, tag_names, _ in validated_tasks for name in tag_names}
+            )
+            content_type = ContentType.objects.get_for_model(Task)
+            TaggedItem.objects.bulk_create(
+                [
+                    TaggedItem(
+                        content_type=content_type, object_id=task.pk, tag=tags[name]
+                    )
+                    for task, (_, tag_names, _) in zip(tasks, validated_tasks)
+                    for name in dict.fromkeys(tag_names)
+                ]
+            )
+        logger.info(
+            f"Tasks created: task_ids={[t.pk for t in tasks]} by user_id={self.user.id}"
+        )
+        return get_tasks_serialized(
+            Task.objects.filter(id__in=[t.pk for t in tasks]).order_by("id")
+        ), True
+
     def update_task(self, task_data: dict):
         logger.info(
             f"Updating task: task_id={task_data['id']} by user_id={self.user.id}"
@@ -54,6 +272,7 @@ class TaskService:
         series_scope = task_data.pop(
             "series_scope", "single"
         )  # 'single' | 'future' | 'all'
+        task_data["id"] = materialize_occurrence(self.user, task_data["id"])
         # Keep a snapshot of pre-update values for recurrence comparison
         original_task = get_object_or_404(Task, id=task_data["id"], user=self.user)
         serializer = TaskSerializer(original_task, data=task_data, partial=True)
@@ -78,14 +297,16 @@ class TaskService:
                         f"Updated {len(updated_tasks)} prev tasks in series:\
                         task_id={updated_instance.pk} by user_id={self.user.id}"
                     )
-                    from .tasks import notify_frontend
-
-                    notify_frontend.delay(  # type: ignore
+                    publish(
                         f"tasks_user_{updated_instance.user.pk}",
                         {
                             "type": "refresh_for_rec_task",
                             "deleted": [t.pk for t in updated_tasks],
-                            "created": TaskSerializer(updated_tasks, many=True).data,
+                            "created": get_tasks_serialized(
+                                Task.objects.filter(
+                                    id__in=[t.pk for t in updated_tasks]
+                                )
+                            ),
                         },
                     )
 
@@ -107,23 +328,196 @@ class TaskService:
         return serializer.errors, False
 
     def delete_task(self, task_id):
+        task_id = materialize_occurrence(self.user, task_id)
         task = get_object_or_404(Task, id=task_id, user=self.user)
         task_data = TaskSerializer(task).data
-        task.delete()
+        delete_tasks(Task.objects.filter(id=task.pk))
         logger.info(f"Task deleted: task_id={task_id} by user_id={self.user.id}")
         return task_data
 
-    def update_task_order(self, tasks: list[dict]):
+    def bulk_update_task_order(self, tasks: list[dict]) -> int:
+        """
+        Give tasks their position in `tasks` (1-based) as new order in one
+        transaction: one ownership check, one bulk update & one bulk insert of
+        history rows no matter how long the column is.
+        """
         logger.info(
             f"Bulk update order by user_id={self.user.id}\
             for task_ids={[t['id'] for t in tasks]}"
         )
-        for idx, task in enumerate(tasks, start=1):
-            task_obj = get_object_or_404(Task, id=task["id"], user=self.user)
-            task_obj.order = idx
-            save_task(task_obj)
+        with transaction.atomic():
+            # clients may send ids as strings, compare them as the ints they are
+            task_ids = [int(materialize_occurrence(self.user, t["id"])) for t in tasks]
+            owned_tasks = Task.objects.filter(user=self.user).in_bulk(task_ids)
+            missing_ids = set(task_ids) - set(owned_tasks)
+            if missing_ids:
+                raise Http404(f"No Task matches the given ids: {missing_ids}")
+
+            change_seq = reserve_change_seq(self.user.id)
+            now = timezone.now()
+            reordered_tasks = []
+            for idx, task_id in enumerate(task_ids, start=1):
+                task = owned_tasks[task_id]
+                task.order = idx
+                task.change_seq = change_seq
+                task.updated_at = now
+                reordered_tasks.append(task)
+            return bulk_update_with_history(
+                reordered_tasks,
+                Task,
+                ["order", "change_seq", "updated_at"],
+                default_user=self.user,
+            )
+
+    def _bulk_update_owned_tasks(
+        self, task_ids: list, apply_changes, fields: list[str]
+    ) -> list[dict]:
+        """
+        Load the user's tasks in `task_ids`, let `apply_changes` edit each one
+        in memory & write `fields` of all of them with one bulk update & one
+        bulk history insert. Returns the updated tasks serialized
+        """
+        with transaction.atomic():
+            # clients may send ids as strings, compare them as the ints they are
+            task_ids = [int(materialize_occurrence(self.user, i)) for i in task_ids]
+            # lock the sequence before the task rows, like `save_task` does
+            change_seq = reserve_change_seq(self.user.id)
+            tasks = list(
+                Task.objects.filter(user=self.user, id__in=task_ids).select_for_update()
+            )
+            missing_ids = set(task_ids) - {t.pk for t in tasks}
+            if missing_ids:
+                raise Http404(f"No Task matches the given ids: {missing_ids}")
+
+            now = timezone.now()
+            for task in tasks:
+                apply_changes(task)
+                task.change_seq = change_seq
+                task.updated_at = now
+            bulk_update_with_history(
+                tasks,
+                Task,
+                [*fields, "change_seq", "updated_at"],
+                default_user=self.user,
+            )
+        return get_tasks_serialized(Task.objects.filter(id__in=task_ids))
+
+    def bulk_set_completion(self, task_ids: list, is_completed: bool) -> list[dict]:
+        logger.info(
+            f"Bulk set completion: task_ids={task_ids} is_completed={is_completed}\
+            by user_id={self.user.id}"
+        )
+
+        def apply_changes(task: Task):
+            task.is_completed = is_completed
+
+        return self._bulk_update_owned_tasks(task_ids, apply_changes, ["is_completed"])
+
+    def bulk_assign_project(self, task_ids: list, project_id) -> list[dict]:
+        """Assign all tasks to a project, `project_id=None` unassigns them"""
+        project = None
+        if project_id is not None:
+            project = get_object_or_404(Project, id=project_id, user=self.user)
+        logger.info(
+            f"Bulk assign project: task_ids={task_ids} project_id={project_id}\
+            by user_id={self.user.id}"
+        )
+
+        def apply_changes(task: Task):
+            task.project = project
+
+        return self._bulk_update_owned_tasks(task_ids, apply_changes, ["project"])
+
+    def bulk_move_tasks(
+        self, task_ids: list, status: str, date: datetime.date | None = None
+    ) -> list[dict]:
+        """
+        Move tasks to `status`. With a `date` tasks are put on that day keeping
+        their time of day, tasks moved to brain dump lose their dates.
+        """
+        if status not in dict(Task.TASK_STATUS_CHOICES):
+            raise ValueError(f"Invalid status: {status}")
+        if status in (Task.ON_BOARD, Task.ON_CAL) and date is None:
+            raise ValueError(f"A date is required to move tasks to {status}")
+        logger.info(
+            f"Bulk move: task_ids={task_ids} status={status} date={date}\
+            by user_id={self.user.id}"
+        )
+
+        # `date` is a day of the user's calendar, not of UTC or the server
+        user_tz = self.user.timezone
+
+        def apply_changes(task: Task):
+            task.status = status
+            if status == Task.BRAINDUMP:
+                task.start_at = task.end_at = None
+            elif date is not None:
+                time_of_day = (
+                    timezone.localtime(task.start_at, user_tz).time()
+                    if task.start_at
+                    else datetime.time()
+                )
+                task.start_at = timezone.make_aware(
+                    datetime.datetime.combine(date, time_of_day), user_tz
+                )
+                task.duration = task.duration or datetime.timedelta(minutes=30)
+                task.end_at = task.start_at + task.duration
+
+        return self._bulk_update_owned_tasks(
+            task_ids, apply_changes, ["status", "start_at", "end_at", "duration"]
+        )
+
+    def bulk_delete_tasks(self, task_ids: list) -> list[int]:
+        with transaction.atomic():
+            task_ids = [int(materialize_occurrence(self.user, i)) for i in task_ids]
+            tasks = Task.objects.filter(user=self.user, id__in=task_ids)
+            missing_ids = set(task_ids) - set(tasks.values_list("id", flat=True))
+            if missing_ids:
+                raise Http404(f"No Task matches the given ids: {missing_ids}")
+            deleted_ids = delete_tasks(tasks)
+        logger.info(f"Tasks deleted: task_ids={deleted_ids} by user_id={self.user.id}")
+        return deleted_ids
+
+    def move_task(self, task_id, before_id=None, after_id=None):
+        """
+        Move a task between two neighbours of its column (`None` for the column
+        edges). Only the moved task gets a new rank, neighbours stay untouched.
+        """
+        task_id = materialize_occurrence(self.user, task_id)
+        task = get_object_or_404(Task, id=task_id, user=self.user)
+        neighbour_ids = [i for i in (before_id, after_id) if i is not None]
+        # ranks only order tasks within a column, neighbours must share it
+        ranks = dict(
+            get_column_tasks(task)
+            .filter(id__in=neighbour_ids)
+            .exclude(id=task.pk)
+            .values_list("id", "order")
+        )
+        if len(ranks) != len(neighbour_ids):
+            raise ValueError(f"Neighbour tasks not found in column: {neighbour_ids}")
+        before_rank = ranks.get(before_id)
+        after_rank = ranks.get(after_id)
+
+        if (
+            before_rank is not None
+            and after_rank is not None
+            and after_rank - before_rank < MIN_RANK_GAP * 2
+        ):
+            # no room left between the neighbours, respace the column with the
+            # task between them instead of writing a rank that ties with them
+            rebalance_column_ranks(task, before_id, after_id)
+            task.refresh_from_db()
+        else:
+            task.order = _rank_between(before_rank, after_rank)
+            save_task(task)
+        logger.info(
+            f"Task moved: task_id={task_id} between before_id={before_id}\
+            after_id={after_id} new_rank={task.order} by user_id={self.user.id}"
+        )
+        return TaskSerializer(task).data
 
     def assign_project_to_task(self, task_id, project_id):
+        task_id = materialize_occurrence(self.user, task_id)
         task = get_object_or_404(Task, id=task_id, user=self.user)
         task.project = get_object_or_404(Project, id=project_id, user=self.user)
         save_task(task)
@@ -134,22 +528,30 @@ class TaskService:
         return TaskSerializer(task).data
 
     def turn_off_repeat(self, task_id):
+        task_id = materialize_occurrence(self.user, task_id)
         task = get_object_or_404(Task, id=task_id, user=self.user)
         if not task.recurrence_series:
             return TaskSerializer(task).data, []
         # delete any future siblings/childrens
         future_task = get_future_siblings(task=task)
-        deleted_future_task_ids = list(future_task.values_list("id", flat=True))
-        deleted_tasks, _ = future_task.delete()
+        deleted_future_task_ids = delete_tasks(future_task)
         logger.info(
-            f"Deleted {deleted_tasks} future siblings with \
+            f"Deleted {len(deleted_future_task_ids)} future siblings with \
             task_ids = {deleted_future_task_ids} for task_id={task_id}\
             by user_id={self.user.id}"
         )
-        # del rec series of this task so all tasks related to this series will be detached
-        # from this series
-        save_task(task)
-        task.recurrence_series.delete()
+        # detach all tasks of the series before deleting it, the FK's SET_NULL
+        # would do it with a bulk update that skips change sequences & history
+        with transaction.atomic():
+            series_tasks = Task.objects.filter(recurrence_series=task.recurrence_series)
+            detached_ids = list(series_tasks.values_list("id", flat=True))
+            series_tasks.update(
+                recurrence_series=None, change_seq=reserve_change_seq(self.user.id)
+            )
+            Task.history.bulk_history_create(  # type:ignore
+                list(Task.objects.filter(id__in=detached_ids)), update=True
+            )
+            task.recurrence_series.delete()
         task.refresh_from_db()
         logger.info(
             f"Turned off repeat for task_id={task_id} by user_id={self.user.id}"
@@ -157,6 +559,7 @@ class TaskService:
         return TaskSerializer(task).data
 
     def toggle_task_completion(self, task_id):
+        task_id = materialize_occurrence(self.user, task_id)
         task = get_object_or_404(Task, id=task_id, user=self.user)
         logger.info(
             f"Toggling completion: task_id={task_id} old_status={task.is_completed} by user_id={self.user.id}"
@@ -175,55 +578,78 @@ def _apply_new_dt_to_datetime_obj(datetime_obj: datetime.datetime, dt: datetime.
     take time from `datetime_obj` & date from `dt`
     and combine them
     """
-    return datetime.datetime.combine(dt, datetime_obj.time())
+    return datetime.datetime.combine(dt, datetime_obj.timetz())
 
 
-def generate_rec_tasks_for_parent(parent_task: Task, occurences_dates: list):
-    results = []
-    for occurence_date in occurences_dates:
-        try:
-            with transaction.atomic():
-                # make sure we don't create two task for same start_at__date & recurrence_parent
-                # so lets first check if there any task exist with same recurrence series & on same date
-                tsk = Task.objects.filter(
-                    recurrence_series=parent_task.recurrence_series,
-                    start_at__date=occurence_date,
-                )
-                if tsk.exists():
-                    continue
-                start_datetime = None
-                end_datetime = None
-                if parent_task.start_at:
-                    # assign current date to start_at field
-                    start_datetime = _apply_new_dt_to_datetime_obj(
-                        parent_task.start_at, occurence_date
-                    )
-                if parent_task.end_at:
-                    end_datetime = _apply_new_dt_to_datetime_obj(
-                        parent_task.end_at, occurence_date
-                    )
-                child = Task.objects.create(
-                    user=parent_task.user,
+def generate_rec_tasks_for_parent(
+    parent_task: Task, occurences_dates: list
+) -> list[Task]:
+    """
+    Create the children of a recurring `parent_task` on `occurences_dates`,
+    skipping dates the series already has a task on. Returns created children.
+    Runs a fixed number of queries however many dates are passed: existing
+    dates are read once, children, their history & tags are inserted in bulk.
+    The series row stays locked until the transaction commits, so concurrent
+    runs can't both create a task of the series on the same date.
+    """
+    series = parent_task.recurrence_series
+    with transaction.atomic():
+        RecurrenceSeries.objects.select_for_update().filter(pk=series.pk).first()
+        existing_dates = set(
+            get_series_tasks_on_dates(series.pk, occurences_dates).values_list(
+                "taken_date", flat=True
+            )
+        )
+        missing_dates = [d for d in occurences_dates if d not in existing_dates]
+        if not missing_dates:
+            return []
+
+        change_seq = reserve_change_seq(parent_task.user_id)  # type:ignore
+        children = []
+        for occurence_date in missing_dates:
+            children.append(
+                Task(
+                    user_id=parent_task.user_id,  # type:ignore
                     title=parent_task.title,
                     description=parent_task.description,
                     order=parent_task.order,
                     is_completed=False,
                     duration=parent_task.duration,
-                    start_at=start_datetime,
-                    end_at=end_datetime,
-                    recurrence_series=parent_task.recurrence_series,
-                    project=parent_task.project,
+                    # take the time from parent & date from occurence
+                    start_at=_apply_new_dt_to_datetime_obj(
+                        parent_task.start_at, occurence_date
+                    )
+                    if parent_task.start_at
+                    else None,
+                    end_at=_apply_new_dt_to_datetime_obj(
+                        parent_task.end_at, occurence_date
+                    )
+                    if parent_task.end_at
+                    else None,
+                    recurrence_series=series,
+                    occurrence_date=occurence_date,
+                    project_id=parent_task.project_id,  # type:ignore
                     status=Task.ON_BOARD,  # TODO: what if task is on calendar? for now we keeping it on board & user can manually drag into cal
+                    change_seq=change_seq,
                 )
-                # copy over tags
-                child.tags.set(parent_task.tags.all())
-
-                msg = f"Recurring task created: parent_task_id={parent_task.pk}\
-                    child_task_id={child.pk} date={occurence_date}, user_id:{parent_task.user.pk}"
-                logger.info(msg)
-                results.append(msg)
+            )
+        children = Task.objects.bulk_create(children)
+        Task.history.bulk_history_create(children)  # type:ignore
 
-        except IntegrityError as e:
-            logger.warning("error while saving task - ", e)
+        # copy over tags
+        content_type = ContentType.objects.get_for_model(Task)
+        tag_ids = list(parent_task.tags.values_list("id", flat=True))
+        TaggedItem.objects.bulk_create(
+            [
+                TaggedItem(content_type=content_type, object_id=child.pk, tag_id=tag_id)
+                for child in children
+                for tag_id in tag_ids
+            ]
+        )
 
-    return results
+    for child in children:
+        logger.info(
+            f"Recurring task created: parent_task_id={parent_task.pk}\
+            child_task_id={child.pk} date={child.start_at and child.start_at.date()}, user_id:{parent_task.user_id}"  # type:ignore
+        )
+    return children
@@ -1,20 +1,43 @@
 import logging
 from django.utils import timezone
 from backend.celery import app
-from .models import Task, RecurrenceSeries
+from celery import chord
+from .models import (
+    Task,
+    RecurrenceSeries,
+    TaskSequence,
+    TaskTombstone,
+    TimezoneRollover,
+)
 import datetime
+import math
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from dateutil.rrule import rrulestr
-from django.db.models import Q
-from .selectors import get_future_siblings, get_latest_task_of_series
+from django.db import transaction
+from django.db.models import (
+    Case,
+    Count,
+    DateTimeField,
+    F,
+    Max,
+    Min,
+    Q,
+    QuerySet,
+    Value,
+    When,
+)
+from .recurrence import get_occurrences, get_rrule_cache_stats
+from .selectors import (
+    get_future_siblings,
+    get_latest_task_of_series,
+    get_tasks_serialized,
+)
 from .services import (
-    save_task,
-    _apply_new_dt_to_datetime_obj,
+    reserve_change_seq,
+    delete_tasks,
     generate_rec_tasks_for_parent,
 )
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
-from .serializers import TaskSerializer
+from .publisher import publish, publish_many, send_direct
 
 logger = logging.getLogger(__name__)
 
@@ -51,7 +74,8 @@ def _gen_rec_tasks_for_parent_or_sibling(
     window_end = start_at + datetime.timedelta(days=days_ahead)
 
     try:
-        rule = rrulestr(rec_rule, dtstart=start_at)
+        # parsed rules & windows are shared by series with the same rule & start
+        occurrence_datetimes = get_occurrences(rec_rule, start_at, start_at, window_end)
     except Exception as e:
         result = f"Error parsing recurrence rule for parent_task_id={parent_or_sibling_task.pk}: {e}"
         logger.error(result)
@@ -60,8 +84,15 @@ def _gen_rec_tasks_for_parent_or_sibling(
     # Convert the occurrences to dates since we're working with date fields
     occurrences = [
         dt.date() if isinstance(dt, datetime.datetime) else dt
-        for dt in rule.between(after=start_at, before=window_end, inc=True)
+        for dt in occurrence_datetimes
     ][:max_events]
+    # occurrences cut off by `max_events` aren't materialized yet
+    materialized_until = (
+        occurrences[-1] if len(occurrences) == max_events else window_end.date()
+    )
+    RecurrenceSeries.objects.filter(
+        pk=parent_or_sibling_task.recurrence_series.pk
+    ).update(materialized_until=materialized_until)
     if not occurrences:
         result = (
             f"No upcoming recurrence for parent_task_id={parent_or_sibling_task.pk}"
@@ -72,15 +103,59 @@ def _gen_rec_tasks_for_parent_or_sibling(
     return generate_rec_tasks_for_parent(parent_or_sibling_task, occurrences)
 
 
+# series whose horizon is closer than this are extended by the periodic job
+HORIZON_REFILL_DAYS = 7
+# how far ahead of today series are materialized
+HORIZON_DAYS_AHEAD = 20
+
+
+def _extend_series_horizon(
+    series: RecurrenceSeries, today: datetime.date
+) -> list[Task]:
+    """
+    Create the missing tasks of `series` from its current horizon up to
+    `HORIZON_DAYS_AHEAD` days after `today`, existing tasks stay untouched.
+    """
+    latest_task = get_latest_task_of_series(series)
+    horizon_end = today + datetime.timedelta(days=HORIZON_DAYS_AHEAD)
+    if not latest_task or not latest_task.start_at:
+        # nothing to copy from, don't pick the series again until the horizon
+        series.materialized_until = horizon_end
+        series.save(update_fields=["materialized_until"])
+        return []
+
+    # the rule runs from the latest task, like `_gen_rec_tasks_for_parent_or_sibling`
+    dtstart = datetime.datetime.combine(latest_task.start_at, datetime.time.min)
+    one_day = datetime.timedelta(days=1)
+    extend_from = max(
+        dtstart.date() + one_day,
+        (series.materialized_until or dtstart.date()) + one_day,
+        today,
+    )
+    occurrences = [
+        dt.date()
+        for dt in get_occurrences(
+            series.recurrence_rule,  # type:ignore
+            dtstart,
+            datetime.datetime.combine(extend_from, datetime.time.min),
+            datetime.datetime.combine(horizon_end, datetime.time.max),
+        )
+    ]
+    created_tasks = generate_rec_tasks_for_parent(latest_task, occurrences)
+    series.materialized_until = horizon_end
+    series.save(update_fields=["materialized_until"])
+    return created_tasks
+
+
 # ---------------------------------------------------------------------------
 # Celery Tasks to invoke using .delay
 # ---------------------------------------------------------------------------
 @app.task(name="notify_frontend")
 def notify_frontend(group_name, data):
     # ------------------- Notify connected client(s) --------------------------------------
+    # fallback of `publisher.publish`, reuses the worker's publisher loop
     try:
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(group_name, data)  # type:ignore
+        send_direct([(group_name, data)])
     except Exception as e:
         logger.error(f"Failed to send refresh_tasks event: {e}", exc_info=True)
 
@@ -106,32 +181,30 @@ def regenerate_recurring_series(task_id: int | str):
         logger.warning(f"Parent/Sibling task not found for regeneration: id={task_id}")
         return "parent-missing"
 
-    future_tasks_to_del = get_future_siblings(task)
-    deleted_ids = list(future_tasks_to_del.values_list("id", flat=True))
-    deleted_count, _ = future_tasks_to_del.delete()
+    deleted_ids = delete_tasks(get_future_siblings(task))
 
     logger.info(
-        f"Deleted {deleted_count} future children/siblings for parent/child task id={task_id}, ids={deleted_ids}"
+        f"Deleted {len(deleted_ids)} future children/siblings for parent/child task id={task_id}, ids={deleted_ids}"
     )
 
-    # Regenerate if rule still present
+    # Regenerate if rule still present, virtual occurrences need no tasks
     created_ids = []
-    tasks = Task.objects.none()
-    if task.recurrence_series.recurrence_rule:
+    created_tasks = []
+    if task.recurrence_series.recurrence_rule and not settings.VIRTUAL_RECURRENCE:
         # Regenerate occurrences only after cutoff date
         _gen_rec_tasks_for_parent_or_sibling(task)
-        tasks = tasks.union(get_future_siblings(task))
-        created_ids = tasks.values_list("id", flat=True)
+        created_tasks = get_tasks_serialized(get_future_siblings(task))
+        created_ids = [t["id"] for t in created_tasks]
         logger.info(
-            f"Generated {tasks.count()} new children for parent_id={task_id}, ids={created_ids}"
+            f"Generated {len(created_ids)} new children for parent_id={task_id}, ids={created_ids}"
         )
 
-    notify_frontend.delay(  # type: ignore
+    publish(
         f"tasks_user_{task.user.pk}",
         {
             "type": "refresh_for_rec_task",
             "deleted": deleted_ids,
-            "created": TaskSerializer(tasks, many=True).data,
+            "created": created_tasks,
         },
     )
     return f"created task IDs: {created_ids}, deleted Tasks IDs: {deleted_ids}"
@@ -140,136 +213,476 @@ def regenerate_recurring_series(task_id: int | str):
 # ---------------------------------------------------------------------------
 # Periodic Celery Tasks to invoke using scheduler ( schedule from admin panel )
 # ---------------------------------------------------------------------------
+# series per shard of the periodic recurrence job
+RECURRENCE_SERIES_PER_SHARD = 2000
+# series a shard loads & processes at once
+RECURRENCE_SHARD_BATCH_SIZE = 200
+
+
+def _due_recurrence_series(today: datetime.date):
+    """Series with a rule whose materialized horizon runs out soon"""
+    return (
+        RecurrenceSeries.objects.filter(
+            Q(materialized_until__isnull=True)
+            | Q(
+                materialized_until__lt=today
+                + datetime.timedelta(days=HORIZON_REFILL_DAYS)
+            )
+        )
+        .exclude(recurrence_rule__isnull=True)
+        .exclude(recurrence_rule="")
+    )
+
+
 @app.task(name="generate_recurring_sibling_tasks_periodic")
 def generate_recurring_sibling_tasks_periodic():
     """
-    Runs every 12 hours in low priority Queue
+    Runs every 12 hours in low priority Queue. Splits the due series into id
+    range shards, processed in parallel by `extend_recurrence_shard` tasks,
+    `aggregate_recurrence_shards` sums up their results.
     """
-    logger.info("generate_recurring_sibling_tasks_periodic: Starting task gen")
-    all_series = RecurrenceSeries.objects.all()
-    for series in all_series:
-        latest_task = get_latest_task_of_series(series)
-        if latest_task:
-            logger.info(
-                f"regenerating task based on \
-                latest task: {latest_task.pk} of\
-                series: {series.pk} & user_id: {latest_task.user.pk}"
-            )
-            regenerate_recurring_series(latest_task.pk)
-    return "generate_recurring_sibling_tasks_periodic: task gen completed"
+    if settings.VIRTUAL_RECURRENCE:
+        # occurrences are expanded when boards are read, nothing to create
+        return "generate_recurring_sibling_tasks_periodic: skipped, virtual recurrence"
+    today = timezone.now().date()
+    due = _due_recurrence_series(today).aggregate(
+        count=Count("id"), min_id=Min("id"), max_id=Max("id")
+    )
+    if not due["count"]:
+        return "generate_recurring_sibling_tasks_periodic: no series due"
+
+    shard_count = math.ceil(due["count"] / RECURRENCE_SERIES_PER_SHARD)
+    id_span = math.ceil((due["max_id"] - due["min_id"] + 1) / shard_count)
+    shards = [
+        extend_recurrence_shard.s(  # type:ignore
+            start_id, start_id + id_span, today.isoformat()
+        )
+        for start_id in range(due["min_id"], due["max_id"] + 1, id_span)
+    ]
+    chord(shards)(aggregate_recurrence_shards.s())  # type:ignore
+    msg = (
+        f"generate_recurring_sibling_tasks_periodic: dispatched {len(shards)} "
+        f"shards for {due['count']} series"
+    )
+    logger.info(msg)
+    return msg
 
 
-@app.task(name="archive_old_tasks_periodic")
-def archive_old_tasks_periodic():
+@app.task(name="extend_recurrence_shard", bind=True)
+def extend_recurrence_shard(self, start_id: int, end_id: int, today: str) -> dict:
+    """
+    Extend the horizon of due series with `start_id <= id < end_id`, in
+    batches of `RECURRENCE_SHARD_BATCH_SIZE`. Reports progress as task state.
+    """
+    today_date = datetime.date.fromisoformat(today)
+    series_in_shard = _due_recurrence_series(today_date).filter(
+        id__gte=start_id, id__lt=end_id
+    )
+    total = series_in_shard.count()
+    result = {"series": 0, "created": 0, "failed": 0}
+    last_id = start_id - 1
+    while True:
+        batch = list(
+            series_in_shard.filter(id__gt=last_id).order_by("id")[
+                :RECURRENCE_SHARD_BATCH_SIZE
+            ]
+        )
+        if not batch:
+            break
+        for series in batch:
+            try:
+                created_tasks = _extend_series_horizon(series, today_date)
+            except Exception as e:
+                logger.error(
+                    f"Failed to extend horizon of series_id={series.pk}: {e}",
+                    exc_info=True,
+                )
+                result["failed"] += 1
+                continue
+            result["series"] += 1
+            result["created"] += len(created_tasks)
+            if created_tasks:
+                publish(
+                    f"tasks_user_{created_tasks[0].user_id}",  # type:ignore
+                    {
+                        "type": "refresh_for_rec_task",
+                        "deleted": [],
+                        "created": get_tasks_serialized(
+                            Task.objects.filter(id__in=[t.pk for t in created_tasks])
+                        ),
+                    },
+                )
+        last_id = batch[-1].pk
+        done = result["series"] + result["failed"]
+        if self.request.id:
+            self.update_state(state="PROGRESS", meta={**result, "total": total})
+        logger.info(
+            f"extend_recurrence_shard [{start_id}, {end_id}): {done}/{total} series"
+        )
+    return result
+
+
+@app.task(name="aggregate_recurrence_shards")
+def aggregate_recurrence_shards(shard_results: list[dict]) -> dict:
+    """Sum up the results of all `extend_recurrence_shard` tasks of a run"""
+    result = {"shards": len(shard_results), "series": 0, "created": 0, "failed": 0}
+    for shard_result in shard_results:
+        for key in ("series", "created", "failed"):
+            result[key] += shard_result[key]
+    logger.info(
+        f"generate_recurring_sibling_tasks_periodic: completed {result}, "
+        f"rrule cache {get_rrule_cache_stats()}"
+    )
+    return result
+
+
+# tasks changed per transaction by the archive & backlog jobs
+STALE_TASKS_CHUNK_SIZE = 1000
+
+
+def _iter_id_chunks(task_ids: QuerySet, chunk_size: int):
+    """Stream `task_ids` with a server side cursor, in lists of `chunk_size`"""
+    chunk = []
+    for task_id in task_ids.iterator(chunk_size=chunk_size):
+        chunk.append(task_id)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _reserve_change_seqs(user_ids) -> dict[int, int]:
+    """
+    Reserve a change sequence of each user, by user id. Call it before locking
+    the users' task rows: `save_task` locks the sequence first too, so
+    concurrent writers take the locks in the same order & can't deadlock.
+    """
+    # sorted, so bulk writers lock sequences of several users in the same order
+    return {user_id: reserve_change_seq(user_id) for user_id in sorted(set(user_ids))}
+
+
+def _bulk_update_task_rows(
+    rows: list[tuple[int, int]], change_seqs: dict[int, int], **updates
+) -> None:
+    """
+    Apply `updates` to the tasks of `(task_id, user_id)` `rows` with one
+    UPDATE, stamping the users' `change_seqs` (see `_reserve_change_seqs`) &
+    bulk inserting their history rows. Run it in the transaction that locked
+    the rows.
+    """
+    task_ids = [task_id for task_id, _ in rows]
+    Task.objects.filter(id__in=task_ids).update(
+        **updates,
+        updated_at=timezone.now(),
+        change_seq=Case(
+            *[
+                When(user_id=user_id, then=Value(change_seq))
+                for user_id, change_seq in change_seqs.items()
+            ]
+        ),
+    )
+    Task.history.bulk_history_create(  # type:ignore
+        list(Task.objects.filter(id__in=task_ids)), update=True
+    )
+
+
+def _group_ids_by_user(rows: list[tuple[int, int]]) -> dict[int, list[int]]:
+    ids_by_user: dict[int, list[int]] = {}
+    for task_id, user_id in rows:
+        ids_by_user.setdefault(user_id, []).append(task_id)
+    return ids_by_user
+
+
+def _set_status_of_stale_chunk(
+    task_ids: list[int], stale_tasks: QuerySet[Task], status: str
+) -> dict[int, list[int]]:
+    """
+    Set `status` on the tasks of `task_ids` still in `stale_tasks`.
+    Returns the changed task ids by user id.
+    """
+    with transaction.atomic():
+        change_seqs = _reserve_change_seqs(
+            stale_tasks.filter(id__in=task_ids)
+            .order_by()
+            .values_list("user_id", flat=True)
+            .distinct()
+        )
+        # rows changed since they were streamed aren't stale anymore
+        rows = list(
+            stale_tasks.select_for_update()
+            .filter(id__in=task_ids, user_id__in=change_seqs)
+            .values_list("id", "user_id")
+        )
+        if rows:
+            _bulk_update_task_rows(rows, change_seqs, status=status)
+    return _group_ids_by_user(rows)
+
+
+@app.task(name="archive_old_tasks_periodic", bind=True, max_retries=3)
+def archive_old_tasks_periodic(self, after_id: int = 0, cutoff: str | None = None):
     """
     Archives tasks that haven't been updated in 30 days.
     This task runs daily at midnight.
+
+    Ids of stale tasks are streamed with a server side cursor & archived in
+    chunks of `STALE_TASKS_CHUNK_SIZE`, each in its own transaction. Archived
+    tasks drop out of the query, so a crashed run is resumed by running it
+    again, a failed run retries itself from the last archived chunk.
     """
-    logger.info("Starting archive_old_tasks task")
+    logger.info(f"Starting archive_old_tasks task after_id={after_id}")
 
-    # Calculate the date 30 days ago
-    thirty_days_ago = timezone.now() - datetime.timedelta(days=30)
+    # Calculate the date 30 days ago, kept the same on retries
+    cutoff_dt = (
+        datetime.datetime.fromisoformat(cutoff)
+        if cutoff
+        else timezone.now() - datetime.timedelta(days=30)
+    )
 
     # Find tasks that haven't been updated in 30 days and aren't already archived
-    old_tasks = Task.objects.filter(
-        updated_at__lt=thirty_days_ago,
-    ).exclude(status=Task.ARCHIVED)
+    old_tasks = Task.objects.filter(updated_at__lt=cutoff_dt).exclude(
+        status=Task.ARCHIVED
+    )
+    old_task_ids = (
+        old_tasks.filter(id__gt=after_id).order_by("id").values_list("id", flat=True)
+    )
 
     count = 0
-    for task in old_tasks:
-        task.status = Task.ARCHIVED
-        save_task(task)  # for further processing of task
-        count += 1
+    try:
+        for chunk in _iter_id_chunks(old_task_ids, STALE_TASKS_CHUNK_SIZE):
+            changed = _set_status_of_stale_chunk(chunk, old_tasks, Task.ARCHIVED)
+            count += sum(len(ids) for ids in changed.values())
+            after_id = chunk[-1]
+            if self.request.id:
+                self.update_state(
+                    state="PROGRESS", meta={"archived": count, "after_id": after_id}
+                )
+            logger.info(f"archive_old_tasks: archived {count} tasks, at id {after_id}")
+    except Exception as e:
+        logger.error(
+            f"archive_old_tasks failed after id {after_id}: {e}", exc_info=True
+        )
+        raise self.retry(
+            exc=e, kwargs={"after_id": after_id, "cutoff": cutoff_dt.isoformat()}
+        )
 
     logger.info(f"Archived {count} old tasks")
     return f"Archived {count} old tasks"
 
 
+def move_old_tasks_to_backlogs(cutoff: datetime.datetime) -> dict[int, list[int]]:
+    """
+    Move open, non recurring tasks not updated since `cutoff` to the backlogs,
+    chunk by chunk. Returns the moved task ids by user id.
+    """
+    # Find tasks that haven't been updated since cutoff and aren't already
+    # archived or in the backlogs
+    old_tasks = Task.objects.filter(
+        updated_at__lt=cutoff,
+        is_completed=False,
+        recurrence_series__isnull=True,
+    ).exclude(status__in=[Task.ARCHIVED, Task.BACKLOG])
+    old_task_ids = old_tasks.order_by("id").values_list("id", flat=True)
+
+    moved_ids_by_user: dict[int, list[int]] = {}
+    count = 0
+    for chunk in _iter_id_chunks(old_task_ids, STALE_TASKS_CHUNK_SIZE):
+        changed = _set_status_of_stale_chunk(chunk, old_tasks, Task.BACKLOG)
+        for user_id, task_ids in changed.items():
+            moved_ids_by_user.setdefault(user_id, []).extend(task_ids)
+            count += len(task_ids)
+        logger.info(
+            f"move_old_tasks_to_backlogs: moved {count} tasks, at id {chunk[-1]}"
+        )
+    return moved_ids_by_user
+
+
 @app.task(name="move_old_tasks_to_backlogs_periodic")
 def move_old_tasks_to_backlogs_periodic():
     """
     Moves tasks that haven't been updated in 15 days to the backlogs.
     This task runs daily at midnight.
+    Every affected user gets one notification with all of its moved tasks.
     """
     logger.info("Starting move_old_tasks_to_backlogs task")
 
     # Calculate the date 15 days ago
     fifteen_days_ago = timezone.now() - datetime.timedelta(days=15)
+    moved_ids_by_user = move_old_tasks_to_backlogs(fifteen_days_ago)
+
+    publish_many(
+        [
+            (
+                f"tasks_user_{user_id}",
+                {
+                    "type": "tasks_status_changed",
+                    "status": Task.BACKLOG,
+                    "ids": task_ids,
+                },
+            )
+            for user_id, task_ids in moved_ids_by_user.items()
+        ]
+    )
 
-    # Find tasks that haven't been updated in 15 days and aren't already archived
-    old_tasks = Task.objects.filter(
-        updated_at__lt=fifteen_days_ago,
-        is_completed=False,
-        recurrence_series__isnull=True,
-    ).exclude(status=Task.ARCHIVED)
-
-    count = 0
-    for task in old_tasks:
-        task.status = Task.BACKLOG
-        save_task(task)
-        count += 1
-
+    count = sum(len(ids) for ids in moved_ids_by_user.values())
     logger.info(f"Moved {count} old tasks to backlogs")
     return f"Moved {count} old tasks to backlogs"
 
 
-@app.task(name="move_yesterday_task_to_today_periodic")
-def move_yesterday_task_to_today_periodic():
+def _same_time_on_day(
+    dt: datetime.datetime, day: datetime.date, tz: datetime.tzinfo
+) -> datetime.datetime:
+    """`dt` moved to the local `day` of `tz`, keeping its local time of day"""
+    return datetime.datetime.combine(day, dt.astimezone(tz).time(), tzinfo=tz)
+
+
+def roll_over_timezone(
+    tz: datetime.tzinfo, today: datetime.date
+) -> dict[int, list[int]]:
     """
-    Move yesterday's tasks to today's date using each user's timezone.
+    Move open, non recurring board & calendar tasks of users in `tz` which
+    start before `today` (local date of `tz`) but after the zone's last
+    rollover to `today`, keeping their local time of day across DST changes.
+    Without a previous rollover only yesterday's tasks move. Returns the moved
+    task ids by user id.
     """
-    logger.info("Starting move_yesterday_task_to_today task")
-    User = get_user_model()
-    total_moved = 0
-
-    for user in User.objects.all():
-        # today midnight time
-        today_date_mid = datetime.datetime.combine(
-            timezone.now().date(),
-            datetime.time.min,
+    with transaction.atomic():
+        # concurrent runs wait here & find the zone rolled over already
+        rollover, _ = TimezoneRollover.objects.select_for_update().get_or_create(
+            timezone=str(tz),
+            defaults={"rolled_over_through": today - datetime.timedelta(days=1)},
         )
-        yesterday_date = (today_date_mid - datetime.timedelta(days=1)).date()
-
-        old_tasks = (
-            Task.objects.filter(Q(status=Task.ON_BOARD) | Q(status=Task.ON_CAL))
-            .filter(
-                user=user,
+        if rollover.rolled_over_through >= today:
+            return {}
+        tasks_to_move = (
+            Task.objects.filter(
+                user__timezone=tz,
+                status__in=[Task.ON_BOARD, Task.ON_CAL],
                 is_completed=False,
-                start_at__date=yesterday_date,
+                start_at__gte=datetime.datetime.combine(
+                    rollover.rolled_over_through, datetime.time.min, tzinfo=tz
+                ),
+                start_at__lt=datetime.datetime.combine(
+                    today, datetime.time.min, tzinfo=tz
+                ),
                 recurrence_series__isnull=True,  # isn't a recurring task
             )
+            # matches the condition of `task_open_user_start_idx`
             .exclude(status=Task.ARCHIVED)
         )
+        change_seqs = _reserve_change_seqs(
+            tasks_to_move.order_by().values_list("user_id", flat=True).distinct()
+        )
+        rows = list(
+            tasks_to_move.select_for_update()
+            .filter(user_id__in=change_seqs)
+            .values_list("id", "user_id", "start_at", "end_at")
+        )
+        for offset in range(0, len(rows), STALE_TASKS_CHUNK_SIZE):
+            chunk = rows[offset : offset + STALE_TASKS_CHUNK_SIZE]
+            # a local day isn't always 24h long, so each task gets its new
+            # start computed from its local time of day
+            start_ats = {
+                task_id: _same_time_on_day(start_at, today, tz)
+                for task_id, _, start_at, _ in chunk
+            }
+            _bulk_update_task_rows(
+                [(task_id, user_id) for task_id, user_id, _, _ in chunk],
+                change_seqs,
+                start_at=Case(
+                    *[When(id=i, then=Value(v)) for i, v in start_ats.items()],
+                    output_field=DateTimeField(),
+                ),
+                end_at=Case(
+                    *[
+                        When(
+                            id=task_id,
+                            then=Value(start_ats[task_id] + (end_at - start_at)),
+                        )
+                        for task_id, _, start_at, end_at in chunk
+                        if end_at
+                    ],
+                    default=F("end_at"),
+                    output_field=DateTimeField(),
+                ),
+            )
+        rollover.rolled_over_through = today
+        rollover.save(update_fields=["rolled_over_through"])
+    return _group_ids_by_user([(task_id, user_id) for task_id, user_id, _, _ in rows])
 
-        moved = 0
-        for task in old_tasks:
-            tsk_changed = False
-            if task.start_at:
-                task.start_at = _apply_new_dt_to_datetime_obj(
-                    task.start_at, today_date_mid.date()
-                )
-                tsk_changed = True
-            if task.end_at:
-                task.end_at = _apply_new_dt_to_datetime_obj(
-                    task.end_at, today_date_mid.date()
-                )
-                tsk_changed = True
-            if tsk_changed:
-                save_task(task)
-                moved += 1
 
+@app.task(name="move_yesterday_task_to_today_periodic")
+def move_yesterday_task_to_today_periodic():
+    """
+    Move yesterday's tasks to today's date using each user's timezone.
+    Scheduled hourly (see migration 0017): every run rolls over the zones
+    which passed their local midnight since their last rollover, one bucket of
+    users per zone, & catches up on days missed runs left out.
+    Only users whose tasks moved are notified.
+    """
+    logger.info("Starting move_yesterday_task_to_today task")
+    User = get_user_model()
+    now = timezone.now()
+    moved_ids_by_user: dict[int, list[int]] = {}
+
+    for tz in User.objects.values_list("timezone", flat=True).distinct():
+        local_now = now.astimezone(tz)
+        moved = roll_over_timezone(tz, local_now.date())
         if moved:
             logger.info(
-                f"Moved {moved} tasks for user_id={user.pk} for date={yesterday_date}"
+                f"Moved {sum(len(ids) for ids in moved.values())} tasks of "
+                f"{len(moved)} users in {tz} to {local_now.date()}"
             )
-        total_moved += moved
-        notify_frontend.delay(  # type: ignore
-            f"tasks_user_{user.pk}",
-            {
-                "type": "full_refresh",
-            },
+        moved_ids_by_user.update(moved)
+
+    if moved_ids_by_user:
+        moved_tasks = get_tasks_serialized(
+            Task.objects.filter(
+                id__in=[i for ids in moved_ids_by_user.values() for i in ids]
+            )
+        )
+        tasks_by_id = {task["id"]: task for task in moved_tasks}
+        publish_many(
+            [
+                (
+                    f"tasks_user_{user_id}",
+                    {
+                        "type": "tasks_bulk_changed",
+                        "sender": None,
+                        "frame": {
+                            "type": "tasks.bulk_updated",
+                            "data": [tasks_by_id[i] for i in task_ids],
+                            "deleted": [],
+                        },
+                    },
+                )
+                for user_id, task_ids in moved_ids_by_user.items()
+            ]
         )
 
+    total_moved = sum(len(ids) for ids in moved_ids_by_user.values())
     logger.info(f"Total moved tasks: {total_moved}")
 
     return f"Moved {total_moved} tasks across all users"
+
+
+@app.task(name="prune_task_tombstones_periodic")
+def prune_task_tombstones_periodic(retention_days: int = 30):
+    """
+    Deletes tombstones of tasks deleted more than `retention_days` ago.
+    Clients which last synced before a pruned tombstone get a full refresh.
+    This task runs daily.
+    """
+    cutoff = timezone.now() - datetime.timedelta(days=retention_days)
+    old_tombstones = TaskTombstone.objects.filter(deleted_at__lt=cutoff)
+    pruned_through_by_user = old_tombstones.values("user_id").annotate(
+        pruned_through=Max("change_seq")
+    )
+    for row in pruned_through_by_user:
+        TaskSequence.objects.filter(user_id=row["user_id"]).update(
+            pruned_through=row["pruned_through"]
+        )
+    deleted_count, _ = old_tombstones.delete()
+
+    logger.info(f"Pruned {deleted_count} task tombstones")
+    return f"Pruned {deleted_count} task tombstones"
@@ -1,9 +1,68 @@
+import asyncio
+import threading
 import pytest
+import apps.core.publisher
+import apps.core.tasks
 import json
+import datetime
+import zlib
+import msgpack
+from asgiref.sync import async_to_sync
 from django.urls import reverse
 from datetime import timedelta
+from zoneinfo import ZoneInfo
 from django.contrib.auth import get_user_model
-from apps.core.models import Task, Project
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.contrib.postgres.search import SearchQuery
+from django.http import Http404, HttpRequest
+from django.utils import timezone
+from django_celery_beat.models import PeriodicTask
+from apps.core.models import Task, Project, RecurrenceSeries, TimezoneRollover
+from apps.core.selectors import (
+    autocomplete_titles_for_user,
+    get_filtered_tasks_for_user_serialized,
+    get_filtered_tasks_page_for_user_serialized,
+    get_future_siblings,
+    get_task_change_seq,
+    get_tasks_changed_since_serialized,
+    get_tasks_serialized,
+    get_virtual_occurrences_serialized,
+    search_tasks_for_user_serialized,
+)
+from apps.core.services import (
+    RANK_STEP,
+    TaskService,
+    generate_rec_tasks_for_parent,
+    rebalance_column_ranks,
+    reserve_change_seq,
+    save_task,
+)
+from apps.core.serializers import TaskSerializer
+from apps.core.tasks import (
+    HORIZON_DAYS_AHEAD,
+    archive_old_tasks_periodic,
+    generate_recurring_sibling_tasks_periodic,
+    move_old_tasks_to_backlogs_periodic,
+    move_yesterday_task_to_today_periodic,
+    notify_frontend,
+    roll_over_timezone,
+)
+from apps.core.recurrence import (
+    clear_rrule_cache,
+    get_occurrences,
+    get_rrule,
+    get_rrule_cache_stats,
+)
+from apps.core.cache import get_board_cache_stats, get_or_load_board
+from apps.core.consumers import TasksConsumer, action_sync_to_async
+from apps.core.publisher import publish_many
+from apps.core.wire_format import pack_frame, unpack_frame
+from apps.core.notifications import (
+    FrameCoalescer,
+    get_notification_stats,
+    reset_notification_stats,
+)
 from django.utils.duration import _get_duration_components
 
 User = get_user_model()
@@ -307,3 +366,1356 @@ def test_validation_on_task_creation(authenticated_client, authenticated_user):
     )
     assert response.status_code == 400
     assert "title" in response.json()
+
+
+@pytest.mark.integration
+def test_fetch_tasks_query_count_is_constant(authenticated_user, project):
+    """Test that loading a board doesn't run queries per task."""
+    series = RecurrenceSeries.objects.create(recurrence_rule="FREQ=DAILY")
+
+    def create_tasks(count):
+        for i in range(count):
+            tsk = Task.objects.create(
+                user=authenticated_user,
+                title=f"Task {i}",
+                project=project,
+                recurrence_series=series,
+            )
+            tsk.tags.add("work", f"tag-{i}")
+
+    def count_queries():
+        with CaptureQueriesContext(connection) as ctx:
+            data = get_filtered_tasks_for_user_serialized(authenticated_user.id, {})
+        return len(ctx.captured_queries), data
+
+    create_tasks(5)
+    small_board_queries, data = count_queries()
+    assert len(data) == 5
+
+    create_tasks(45)
+    big_board_queries, data = count_queries()
+    assert len(data) == 50
+    assert big_board_queries == small_board_queries
+    assert set(data[0]["tags"]) == {"work", "tag-0"}
+    assert data[0]["project"]["id"] == project.id
+
+
+@pytest.mark.integration
+def test_tasks_encoder_matches_task_serializer(authenticated_user, project):
+    """Test that the read only encoder output is identical to TaskSerializer."""
+    series = RecurrenceSeries.objects.create(recurrence_rule="FREQ=WEEKLY;BYDAY=MO")
+    now = timezone.now()
+    Task.objects.create(user=authenticated_user, title="Bare Task")
+    Task.objects.create(
+        user=authenticated_user,
+        title="Scheduled Task",
+        description="with project & series",
+        project=project,
+        recurrence_series=series,
+        status=Task.ON_BOARD,
+        start_at=now,
+        end_at=now + timedelta(hours=1),
+        duration=timedelta(days=1, hours=2, minutes=5),
+        frontend_id=123456789,
+    ).tags.add("work", "important")
+    Task.objects.create(
+        user=authenticated_user,
+        title="Completed Task",
+        is_completed=True,
+        duration=timedelta(minutes=45),
+    ).tags.add("work")
+
+    tasks = Task.objects.filter(user=authenticated_user)
+    expected = json.dumps(TaskSerializer(tasks, many=True).data)
+    assert json.dumps(get_tasks_serialized(tasks)) == expected
+
+
+@pytest.mark.integration
+def test_task_serializer_uses_prefetched_tags(authenticated_user):
+    """Test that serializing tasks with prefetched tags doesn't query per task."""
+    for i in range(20):
+        Task.objects.create(user=authenticated_user, title=f"Task {i}").tags.add(
+            "work", "admin", f"tag-{i}"
+        )
+
+    tasks = Task.objects.filter(user=authenticated_user).prefetch_related("tags")
+    with CaptureQueriesContext(connection) as ctx:
+        data = TaskSerializer(tasks, many=True).data
+    assert len(ctx.captured_queries) == 2
+    assert data[0]["tags"] == ["admin", "tag-0", "work"]
+
+
+@pytest.mark.integration
+def test_fetch_tasks_keyset_pagination(authenticated_user):
+    """Test that walking all pages returns every task once in keyset order."""
+    now = timezone.now()
+    for i in range(7):
+        # tasks sharing start_at & order are ordered by id
+        Task.objects.create(
+            user=authenticated_user, title=f"Task {i}", order=i % 2, start_at=now
+        )
+        Task.objects.create(user=authenticated_user, title=f"Unscheduled {i}")
+    fetch_page = get_filtered_tasks_page_for_user_serialized
+
+    pages = []
+    cursor = None
+    while True:
+        page, cursor = fetch_page(authenticated_user.id, {}, cursor, 3)
+        pages.append(page)
+        if cursor is None:
+            break
+
+    fetched_ids = [t["id"] for page in pages for t in page]
+    scheduled = Task.objects.filter(start_at__isnull=False).order_by("order", "id")
+    unscheduled = Task.objects.filter(start_at__isnull=True).order_by("order", "id")
+    assert fetched_ids == [t.id for t in scheduled] + [t.id for t in unscheduled]
+    assert [len(page) for page in pages] == [3, 3, 3, 3, 2]
+
+    with pytest.raises(ValueError):
+        fetch_page(authenticated_user.id, {}, "not-a-cursor", 3)
+
+
+@pytest.mark.integration
+def test_sync_since_returns_only_changes(authenticated_user):
+    """Test that delta sync sends tasks changed & deleted after a version."""
+    sync_since = get_tasks_changed_since_serialized
+    unchanged = save_task(Task(user=authenticated_user, title="Unchanged"))
+    updated = save_task(Task(user=authenticated_user, title="Updated"))
+    deleted = save_task(Task(user=authenticated_user, title="Deleted"))
+    version = get_task_change_seq(authenticated_user.id)
+
+    updated.title = "Updated again"
+    save_task(updated)
+    TaskService(authenticated_user).delete_task(deleted.id)
+    created = save_task(Task(user=authenticated_user, title="Created"))
+
+    changes = sync_since(authenticated_user.id, version)
+    assert {t["id"] for t in changes["data"]} == {updated.id, created.id}
+    assert changes["deleted"] == [deleted.id]
+    assert changes["version"] == get_task_change_seq(authenticated_user.id)
+    assert unchanged.id not in {t["id"] for t in changes["data"]}
+
+    # nothing changed since the latest version
+    changes = sync_since(authenticated_user.id, changes["version"])
+    assert changes["data"] == [] and changes["deleted"] == []
+
+
+@pytest.mark.integration
+def test_turn_off_repeat_stamps_detached_siblings(authenticated_user):
+    """Test that tasks detached from a deleted series reach delta sync."""
+    series = RecurrenceSeries.objects.create(recurrence_rule="FREQ=DAILY")
+    start_at = timezone.now() - timedelta(days=2)
+    past, task = [
+        save_task(
+            Task(
+                user=authenticated_user,
+                title="Standup",
+                start_at=start_at + timedelta(days=days),
+                recurrence_series=series,
+            )
+        )
+        for days in (0, 1)
+    ]
+    version = get_task_change_seq(authenticated_user.id)
+
+    TaskService(authenticated_user).turn_off_repeat(task.id)
+
+    changes = get_tasks_changed_since_serialized(authenticated_user.id, version)
+    assert {t["id"] for t in changes["data"]} == {past.id, task.id}
+    assert not RecurrenceSeries.objects.filter(id=series.id).exists()
+    past.refresh_from_db()
+    assert past.recurrence_series is None
+    assert past.history.first().recurrence_series is None
+
+
+@pytest.mark.integration
+def test_board_cache_is_invalidated_by_task_writes(
+    authenticated_user, settings, django_capture_on_commit_callbacks
+):
+    """Test that cached boards are served until a task of the user changes."""
+    settings.CACHES = {
+        **settings.CACHES,
+        "task_boards": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    }
+    loads = []
+
+    def load():
+        loads.append(1)
+        return {"type": "tasks.list", "data": [], "version": len(loads)}
+
+    params = {"filters": {}, "cursor": None, "page_size": None}
+    assert get_or_load_board(authenticated_user.id, params, load)["version"] == 1
+    assert get_or_load_board(authenticated_user.id, params, load)["version"] == 1
+    # a different filter signature is cached separately
+    get_or_load_board(authenticated_user.id, {**params, "page_size": 10}, load)
+    assert len(loads) == 2
+
+    with django_capture_on_commit_callbacks(execute=True):
+        save_task(Task(user=authenticated_user, title="New Task"))
+    assert get_or_load_board(authenticated_user.id, params, load)["version"] == 3
+
+    stats = get_board_cache_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 3)
+
+
+@pytest.mark.integration
+def test_move_task_only_reranks_moved_task(authenticated_user):
+    """Test that moving a task rewrites its rank only & keeps column order."""
+    first, second, third = [
+        Task.objects.create(user=authenticated_user, title=f"Task {i}", order=i)
+        for i in range(1, 4)
+    ]
+    service = TaskService(authenticated_user)
+
+    # move `third` between `first` & `second`
+    data = service.move_task(third.id, before_id=first.id, after_id=second.id)
+    assert data["order"] == 1.5
+    # move `first` to the bottom of the column
+    service.move_task(first.id, before_id=second.id, after_id=None)
+
+    column = list(Task.objects.order_by("order").values_list("id", "order"))
+    assert column == [(third.id, 1.5), (second.id, 2), (first.id, 2 + RANK_STEP)]
+
+    with pytest.raises(ValueError):
+        service.move_task(first.id, before_id=987654321)
+
+
+@pytest.mark.integration
+def test_move_task_between_tied_neighbours_respaces_column(authenticated_user):
+    """Test that a move between neighbours without a gap lands between them."""
+    after, before, task = [
+        Task.objects.create(user=authenticated_user, title=f"Task {i}", order=rank)
+        for i, rank in enumerate([1.0, 1.0, 5.0])
+    ]
+    service = TaskService(authenticated_user)
+
+    data = service.move_task(task.id, before_id=before.id, after_id=after.id)
+    column = list(Task.objects.order_by("order").values_list("id", flat=True))
+    assert column == [before.id, task.id, after.id]
+    assert data["order"] == 2 * RANK_STEP
+
+    # neighbours of another column are refused
+    other_column = Task.objects.create(
+        user=authenticated_user, title="Done", status=Task.COMPLETED, order=3.0
+    )
+    with pytest.raises(ValueError):
+        service.move_task(task.id, before_id=before.id, after_id=other_column.id)
+
+
+@pytest.mark.integration
+def test_move_task_column_mixes_board_and_calendar_tasks_of_local_day(
+    authenticated_user,
+):
+    """Test that a column holds board & calendar tasks of the user's local day."""
+    tz = ZoneInfo("America/New_York")
+    authenticated_user.timezone = tz
+    authenticated_user.save()
+    day = datetime.date(2025, 3, 4)
+    morning = datetime.datetime.combine(day, datetime.time(9), tzinfo=tz)
+    # already the next day in UTC
+    late_evening = datetime.datetime.combine(day, datetime.time(23, 30), tzinfo=tz)
+    board_task = Task.objects.create(
+        user=authenticated_user, status=Task.ON_BOARD, start_at=morning, order=1
+    )
+    calendar_task = Task.objects.create(
+        user=authenticated_user, status=Task.ON_CAL, start_at=late_evening, order=2
+    )
+    moved = Task.objects.create(
+        user=authenticated_user, status=Task.ON_BOARD, start_at=morning, order=3
+    )
+    next_day = Task.objects.create(
+        user=authenticated_user,
+        status=Task.ON_BOARD,
+        start_at=late_evening + timedelta(hours=1),
+        order=1.5,
+    )
+    service = TaskService(authenticated_user)
+
+    data = service.move_task(
+        moved.id, before_id=board_task.id, after_id=calendar_task.id
+    )
+    assert data["order"] == 1.5
+
+    with pytest.raises(ValueError):
+        service.move_task(moved.id, before_id=next_day.id)
+
+
+@pytest.mark.integration
+def test_rebalance_column_ranks(authenticated_user):
+    """Test that rebalancing respaces ranks & keeps the column order."""
+    ranks = [1.0, 1.0000001, 1.0000002]
+    tasks = [
+        Task.objects.create(user=authenticated_user, title=f"Task {i}", order=rank)
+        for i, rank in enumerate(ranks)
+    ]
+    assert rebalance_column_ranks(tasks[0]) == 3
+    column = list(Task.objects.order_by("order").values_list("id", "order"))
+    assert column == [(t.id, (i + 1) * RANK_STEP) for i, t in enumerate(tasks)]
+
+
+@pytest.mark.integration
+def test_bulk_update_task_order_query_count_is_constant(authenticated_user):
+    """Test that reordering a column runs the same queries for any length."""
+    service = TaskService(authenticated_user)
+    # the first write of a user creates its TaskSequence, keep it out of the count
+    reserve_change_seq(authenticated_user.id)
+
+    def reorder_reversed(count):
+        tasks = Task.objects.bulk_create(
+            [Task(user=authenticated_user, title=f"Task {i}") for i in range(count)]
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            service.bulk_update_task_order([{"id": t.pk} for t in reversed(tasks)])
+        orders = dict(
+            Task.objects.filter(id__in=[t.pk for t in tasks]).values_list("id", "order")
+        )
+        assert [orders[t.pk] for t in reversed(tasks)] == list(range(1, count + 1))
+        assert Task.history.filter(id__in=[t.pk for t in tasks]).count() == count
+        return len(ctx.captured_queries)
+
+    # stay below SQLite's bound params limit, which splits the history insert
+    assert reorder_reversed(5) == reorder_reversed(30)
+
+    second_user = User.objects.create_user(
+        email="seconduser@example.com", password="securepass123"
+    )
+    foreign_task = Task.objects.create(user=second_user, title="Foreign Task")
+    with pytest.raises(Http404):
+        service.bulk_update_task_order([{"id": foreign_task.id}])
+
+
+@pytest.mark.integration
+def test_create_tasks_in_bulk(authenticated_user, project):
+    """Test that a batch of tasks is created with tags, series & history."""
+    service = TaskService(authenticated_user)
+    request = HttpRequest()
+    request.user = authenticated_user
+    payloads = [
+        {
+            "title": f"Task {i}",
+            "frontend_id": i,
+            "tags": ["work", f"tag-{i}"],
+            "project_id": project.id,
+        }
+        for i in range(3)
+    ]
+    payloads[0]["recurrence_series"] = {"recurrence_rule": "FREQ=DAILY"}
+
+    data, is_created = service.create_tasks(payloads, request)
+
+    assert is_created
+    assert [t["title"] for t in data] == ["Task 0", "Task 1", "Task 2"]
+    tasks = Task.objects.filter(user=authenticated_user).order_by("id")
+    assert data == TaskSerializer(tasks, many=True).data
+    assert sorted(tasks[1].tags.names()) == ["tag-1", "work"]
+    assert tasks[0].recurrence_series.recurrence_rule == "FREQ=DAILY"
+    assert Task.history.filter(user=authenticated_user).count() == 3
+    assert get_task_change_seq(authenticated_user.id) == tasks[0].change_seq
+
+    # one invalid payload fails the whole batch
+    errors, is_created = service.create_tasks(
+        [{"title": "Valid"}, {"description": "no title"}], request
+    )
+    assert not is_created
+    assert "title" in errors[1]
+    assert Task.objects.filter(user=authenticated_user).count() == 3
+
+
+@pytest.mark.integration
+def test_bulk_task_actions(authenticated_user, project):
+    """Test bulk complete, move, re-project & delete of a task selection."""
+    service = TaskService(authenticated_user)
+    reserve_change_seq(authenticated_user.id)
+
+    def create_tasks(count):
+        return [
+            Task.objects.create(user=authenticated_user, title=f"Task {i}")
+            for i in range(count)
+        ]
+
+    def count_queries(action, *args):
+        with CaptureQueriesContext(connection) as ctx:
+            action(*args)
+        return len(ctx.captured_queries)
+
+    few_ids = [t.id for t in create_tasks(2)]
+    many_ids = [t.id for t in create_tasks(20)]
+    assert count_queries(service.bulk_set_completion, few_ids, True) == count_queries(
+        service.bulk_set_completion, many_ids, True
+    )
+    assert Task.objects.filter(is_completed=True).count() == 22
+
+    moved = service.bulk_move_tasks(many_ids, Task.ON_BOARD, datetime.date(2030, 1, 15))
+    assert {t["status"] for t in moved} == {Task.ON_BOARD}
+    assert {t["start_at"][:10] for t in moved} == {"2030-01-15"}
+    with pytest.raises(ValueError):
+        service.bulk_move_tasks(many_ids, Task.ON_BOARD)
+
+    service.bulk_assign_project(few_ids, project.id)
+    assert set(project.tasks.values_list("id", flat=True)) == set(few_ids)
+
+    assert sorted(service.bulk_delete_tasks(few_ids)) == sorted(few_ids)
+    assert not Task.objects.filter(id__in=few_ids).exists()
+
+    # nothing is changed if any task isn't the user's
+    second_user = User.objects.create_user(
+        email="seconduser@example.com", password="securepass123"
+    )
+    foreign_task = Task.objects.create(user=second_user, title="Foreign Task")
+    with pytest.raises(Http404):
+        service.bulk_delete_tasks([many_ids[0], foreign_task.id])
+    assert Task.objects.filter(id=many_ids[0]).exists()
+
+
+@pytest.mark.integration
+def test_bulk_move_keeps_local_time_of_day(authenticated_user):
+    """Test that bulk moves put tasks on the day of the user's calendar."""
+    tz = ZoneInfo("America/New_York")
+    authenticated_user.timezone = tz
+    authenticated_user.save()
+    service = TaskService(authenticated_user)
+    # 21:00 in New York is already the next day in UTC
+    late = Task.objects.create(
+        user=authenticated_user,
+        title="Late",
+        start_at=datetime.datetime(2030, 1, 10, 21, 0, tzinfo=tz),
+    )
+    undated = Task.objects.create(user=authenticated_user, title="Undated")
+
+    service.bulk_move_tasks(
+        [str(late.id), str(undated.id)], Task.ON_BOARD, datetime.date(2030, 7, 1)
+    )
+
+    late.refresh_from_db()
+    undated.refresh_from_db()
+    assert late.start_at == datetime.datetime(2030, 7, 1, 21, 0, tzinfo=tz)
+    assert undated.start_at == datetime.datetime(2030, 7, 1, tzinfo=tz)
+    assert service.bulk_delete_tasks([str(undated.id)]) == [undated.id]
+
+
+@pytest.mark.integration
+def test_search_tasks_endpoint_rejects_empty_query(authenticated_client):
+    """Test that the task search endpoint needs a query."""
+    url = reverse("core:task_search")
+    response = authenticated_client.get(url, {"q": "  "})
+    assert response.status_code == 400
+
+
+@pytest.mark.integration
+def test_search_tasks_ranks_title_matches_first(authenticated_user):
+    """Test that full text search matches stems & ranks title hits first."""
+    if connection.vendor != "postgresql":
+        pytest.skip("Full text search needs PostgreSQL")
+
+    in_description = Task.objects.create(
+        user=authenticated_user, title="Monthly admin", description="Send invoices"
+    )
+    in_title = Task.objects.create(user=authenticated_user, title="Invoice ACME")
+    Task.objects.create(user=authenticated_user, title="Buy groceries")
+    second_user = User.objects.create_user(
+        email="seconduser@example.com", password="securepass123"
+    )
+    Task.objects.create(user=second_user, title="Invoice for someone else")
+
+    results = search_tasks_for_user_serialized(authenticated_user.id, "invoice")
+    assert [t["id"] for t in results] == [in_title.id, in_description.id]
+
+    # the trigger keeps the vector up to date on bulk updates too
+    Task.objects.filter(id=in_title.id).update(title="Quote ACME")
+    results = search_tasks_for_user_serialized(authenticated_user.id, "invoice")
+    assert [t["id"] for t in results] == [in_description.id]
+
+
+@pytest.mark.integration
+def test_autocomplete_prefix_matches_are_cached(
+    authenticated_client,
+    authenticated_user,
+    project,
+    settings,
+    django_capture_on_commit_callbacks,
+):
+    """Test short queries match by prefix, per user, & are cached per query."""
+    settings.CACHES = {
+        **settings.CACHES,
+        "task_boards": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    }
+    Task.objects.create(user=authenticated_user, title="Tea with Sam")
+    Task.objects.create(
+        user=authenticated_user, title="Test archive", status=Task.ARCHIVED
+    )
+    second_user = User.objects.create_user(
+        email="seconduser@example.com", password="securepass123"
+    )
+    Task.objects.create(user=second_user, title="Team sync")
+    url = reverse("core:autocomplete_titles")
+
+    response = authenticated_client.get(url, {"q": "te"})
+    assert response.status_code == 200
+    assert [t["title"] for t in response.json()["tasks"]] == ["Tea with Sam"]
+    assert [p["title"] for p in response.json()["projects"]] == ["Test Project"]
+
+    # cached until the next write of the user
+    Project.objects.create(user=authenticated_user, title="Tennis")
+    assert len(authenticated_client.get(url, {"q": "te"}).json()["projects"]) == 1
+    with django_capture_on_commit_callbacks(execute=True):
+        save_task(Task.objects.get(title="Tea with Sam"))
+    assert len(authenticated_client.get(url, {"q": "te"}).json()["projects"]) == 2
+
+
+@pytest.mark.integration
+def test_autocomplete_tolerates_typos(authenticated_user, project):
+    """Test trigram matching finds titles despite typos, best match first."""
+    if connection.vendor != "postgresql":
+        pytest.skip("Trigram matching needs PostgreSQL")
+
+    Task.objects.create(user=authenticated_user, title="Prepare quarterly report")
+    Task.objects.create(user=authenticated_user, title="Report bug in quartz")
+    Task.objects.create(user=authenticated_user, title="Walk the dog")
+
+    results = autocomplete_titles_for_user(authenticated_user.id, "quartely")
+    assert [t["title"] for t in results["tasks"]][0] == "Prepare quarterly report"
+    assert "Walk the dog" not in [t["title"] for t in results["tasks"]]
+    results = autocomplete_titles_for_user(authenticated_user.id, "tset projcet")
+    assert [p["id"] for p in results["projects"]] == [project.id]
+
+
+@pytest.mark.integration
+def test_generate_rec_tasks_for_parent_is_set_based(authenticated_user, project):
+    """Test that recurrence expansion runs fixed queries & skips taken dates."""
+    series = RecurrenceSeries.objects.create(recurrence_rule="FREQ=DAILY")
+    start_at = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    parent = Task.objects.create(
+        user=authenticated_user,
+        title="Standup",
+        start_at=start_at,
+        end_at=start_at + timedelta(minutes=15),
+        recurrence_series=series,
+        project=project,
+    )
+    parent.tags.add("daily", "work")
+    reserve_change_seq(authenticated_user.id)
+
+    def generate(days):
+        dates = [(start_at + timedelta(days=d)).date() for d in days]
+        with CaptureQueriesContext(connection) as ctx:
+            results = generate_rec_tasks_for_parent(parent, dates)
+        return len(results), len(ctx.captured_queries)
+
+    created, few_queries = generate(range(1, 4))
+    assert created == 3
+    created, many_queries = generate(range(4, 16))
+    assert created == 12
+    assert few_queries == many_queries
+
+    # dates the series has a task on already are skipped
+    assert generate(range(0, 16))[0] == 0
+    children = Task.objects.filter(recurrence_series=series).exclude(id=parent.id)
+    assert children.count() == 15
+    child = children.first()
+    assert sorted(child.tags.names()) == ["daily", "work"]
+    assert child.project == project
+    assert Task.history.filter(id__in=children.values("id")).count() == 15
+
+    # a task moved onto the day of another occurrence is fine
+    child.start_at = child.start_at + timedelta(days=1)
+    save_task(child)
+    assert (
+        Task.objects.filter(recurrence_series=series, start_at=child.start_at).count()
+        == 2
+    )
+    # & its own date stays taken
+    assert generate_rec_tasks_for_parent(parent, [child.occurrence_date]) == []
+
+
+@pytest.mark.integration
+def test_virtual_occurrences_materialize_on_change(authenticated_user, settings):
+    """Test that occurrences are expanded on read & created once changed."""
+    settings.VIRTUAL_RECURRENCE = True
+    series = RecurrenceSeries.objects.create(recurrence_rule="FREQ=DAILY")
+    start_at = datetime.datetime(2030, 1, 1, 9, 30, tzinfo=datetime.timezone.utc)
+    parent = Task.objects.create(
+        user=authenticated_user,
+        title="Standup",
+        start_at=start_at,
+        end_at=start_at + timedelta(minutes=15),
+        recurrence_series=series,
+    )
+    parent.tags.add("daily")
+    filters = {
+        "start_at_after": "2030-01-01T00:00:00Z",
+        "start_at_before": "2030-01-05T00:00:00Z",
+    }
+
+    occurrences = get_virtual_occurrences_serialized(authenticated_user.id, filters)
+    assert [t["id"] for t in occurrences] == [
+        f"rec-{series.id}-2030-01-0{day}" for day in (2, 3, 4)
+    ]
+    assert occurrences[0]["start_at"] == "2030-01-02T09:30:00Z"
+    assert occurrences[0]["end_at"] == "2030-01-02T09:45:00Z"
+    assert occurrences[0]["tags"] == ["daily"]
+    assert occurrences[0]["virtual"] is True
+    assert Task.objects.count() == 1
+
+    data = TaskService(authenticated_user).toggle_task_completion(occurrences[1]["id"])
+    assert data["is_completed"] is True
+    assert data["start_at"] == "2030-01-03T09:30:00Z"
+    assert Task.objects.count() == 2
+    occurrences = get_virtual_occurrences_serialized(authenticated_user.id, filters)
+    assert [t["id"] for t in occurrences] == [
+        f"rec-{series.id}-2030-01-02",
+        f"rec-{series.id}-2030-01-04",
+    ]
+
+    # a materialized occurrence moved elsewhere doesn't come back on its date
+    service = TaskService(authenticated_user)
+    service.bulk_move_tasks([data["id"]], Task.BRAINDUMP)
+    occurrences = get_virtual_occurrences_serialized(authenticated_user.id, filters)
+    assert len(occurrences) == 2
+    assert Task.objects.get(id=data["id"]).occurrence_date == datetime.date(2030, 1, 3)
+
+    # reordering & deleting take virtual ids too
+    service.bulk_update_task_order(
+        [{"id": f"rec-{series.id}-2030-01-04"}, {"id": parent.id}]
+    )
+    reordered = Task.objects.get(occurrence_date=datetime.date(2030, 1, 4))
+    assert (reordered.order, Task.objects.get(id=parent.id).order) == (1, 2)
+    deleted_ids = service.bulk_delete_tasks([f"rec-{series.id}-2030-01-02"])
+    assert len(deleted_ids) == 1
+    assert not Task.objects.filter(id__in=deleted_ids).exists()
+
+
+@pytest.mark.unit
+def test_rrule_cache_shares_parsed_rules():
+    """Test that rules starting on the same day are parsed & expanded once."""
+    clear_rrule_cache()
+    rule = "FREQ=WEEKLY;BYDAY=MO,WE,FR"
+    dtstart = datetime.datetime(2030, 1, 1, 9, 0)
+    window_end = dtstart + timedelta(days=6)
+
+    first = get_occurrences(rule, dtstart, dtstart, window_end)
+    assert first == get_occurrences(rule, dtstart, dtstart, window_end)
+    assert first == tuple(datetime.datetime(2030, 1, day, 9, 0) for day in (2, 4, 7))
+    # another time of day on the same day shares the entry
+    later = dtstart.replace(hour=17, minute=45, second=12)
+    assert [dt.time() for dt in get_occurrences(rule, later, later, window_end)] == [
+        datetime.time(17, 45, 12)
+    ] * 2
+
+    stats = get_rrule_cache_stats()
+    assert stats["occurrences"] == {
+        "hits": 2,
+        "misses": 1,
+        "hit_rate": 2 / 3,
+        "size": 1,
+    }
+    assert stats["rules"]["misses"] == 1
+    # rules by the hour depend on the exact start
+    get_occurrences("FREQ=HOURLY", dtstart, dtstart, window_end)
+    assert get_rrule_cache_stats()["occurrences"]["misses"] == 2
+    with pytest.raises(ValueError):
+        get_rrule("FREQ=SOMETIMES")
+
+
+@pytest.mark.integration
+def test_periodic_recurrence_extends_only_due_series(
+    authenticated_user, monkeypatch, django_capture_on_commit_callbacks
+):
+    """Test that the periodic job extends series near their horizon in place."""
+    notifications = []
+    monkeypatch.setattr(
+        apps.core.publisher,
+        "send_now",
+        lambda messages: notifications.extend(data for _, data in messages),
+    )
+    # run the shards & the aggregate in process instead of on workers
+    chord_results = []
+    monkeypatch.setattr(
+        apps.core.tasks,
+        "chord",
+        lambda header: lambda callback: chord_results.append(
+            callback.apply(args=([sig.apply().get() for sig in header],)).get()
+        ),
+    )
+    monkeypatch.setattr(apps.core.tasks, "RECURRENCE_SERIES_PER_SHARD", 2)
+    today = timezone.now().date()
+    start_at = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0)
+
+    def create_series(materialized_until):
+        series = RecurrenceSeries.objects.create(
+            recurrence_rule="FREQ=DAILY", materialized_until=materialized_until
+        )
+        task = Task.objects.create(
+            user=authenticated_user,
+            title="Standup",
+            start_at=start_at,
+            recurrence_series=series,
+        )
+        return series, task
+
+    due_series, due_task = create_series(today + timedelta(days=2))
+    done_series, _ = create_series(today + timedelta(days=30))
+    for _ in range(3):
+        create_series(None)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        generate_recurring_sibling_tasks_periodic()
+
+    # 4 due series, 2 per shard
+    expected_created = (HORIZON_DAYS_AHEAD - 2) + 3 * HORIZON_DAYS_AHEAD
+    assert chord_results == [
+        {"shards": 2, "series": 4, "created": expected_created, "failed": 0}
+    ]
+    due_series.refresh_from_db()
+    assert due_series.materialized_until == today + timedelta(days=HORIZON_DAYS_AHEAD)
+    # existing tasks are kept, the gap up to the old horizon isn't backfilled
+    assert Task.objects.filter(id=due_task.id).exists()
+    created_dates = sorted(
+        Task.objects.filter(recurrence_series=due_series)
+        .exclude(id=due_task.id)
+        .values_list("start_at__date", flat=True)
+    )
+    assert created_dates == [
+        today + timedelta(days=d) for d in range(3, HORIZON_DAYS_AHEAD + 1)
+    ]
+    assert Task.objects.filter(recurrence_series=done_series).count() == 1
+    assert len(notifications) == 4
+
+    # nothing is due anymore
+    with CaptureQueriesContext(connection) as ctx:
+        generate_recurring_sibling_tasks_periodic()
+    assert len(ctx.captured_queries) == 1
+    assert len(chord_results) == 1
+
+
+@pytest.mark.integration
+def test_archive_old_tasks_in_chunks(authenticated_user, monkeypatch):
+    """Test that stale tasks are archived chunk by chunk with history rows"""
+    monkeypatch.setattr(apps.core.tasks, "STALE_TASKS_CHUNK_SIZE", 2)
+    other_user = User.objects.create_user(email="other@example.com", password="x")
+    stale_tasks = [
+        Task.objects.create(user=user, title=f"Stale {i}")
+        for i, user in enumerate([authenticated_user, other_user] * 3)
+    ]
+    recent_task = Task.objects.create(user=authenticated_user, title="Recent")
+    Task.objects.filter(id__in=[t.id for t in stale_tasks]).update(
+        updated_at=timezone.now() - timedelta(days=31)
+    )
+    seq_before = reserve_change_seq(authenticated_user.pk)
+
+    # resume after the first stale task, as a retry would
+    result = archive_old_tasks_periodic(after_id=stale_tasks[0].id)
+
+    assert result == "Archived 5 old tasks"
+    stale_tasks[0].refresh_from_db()
+    assert stale_tasks[0].status != Task.ARCHIVED
+    for task in stale_tasks[1:]:
+        task.refresh_from_db()
+        assert task.status == Task.ARCHIVED
+        assert task.history.first().status == Task.ARCHIVED
+        assert task.history.count() == 2
+    recent_task.refresh_from_db()
+    assert recent_task.status != Task.ARCHIVED
+    # one change sequence per user & chunk
+    assert stale_tasks[2].change_seq == seq_before + 1
+    assert stale_tasks[4].change_seq == seq_before + 2
+
+    # a rerun finds the remaining task only
+    assert archive_old_tasks_periodic() == "Archived 1 old tasks"
+
+
+@pytest.mark.integration
+def test_move_old_tasks_to_backlogs_notifies_once_per_user(
+    authenticated_user, monkeypatch, django_capture_on_commit_callbacks
+):
+    """Test that stale tasks move to the backlogs with one event per user"""
+    monkeypatch.setattr(apps.core.tasks, "STALE_TASKS_CHUNK_SIZE", 2)
+    notifications = []
+    monkeypatch.setattr(apps.core.publisher, "send_now", notifications.extend)
+    other_user = User.objects.create_user(email="other@example.com", password="x")
+    stale_tasks = [
+        Task.objects.create(user=user, title=f"Stale {i}", status=Task.ON_BOARD)
+        for i, user in enumerate([authenticated_user, other_user, authenticated_user])
+    ]
+    completed_task = Task.objects.create(
+        user=authenticated_user, title="Done", is_completed=True
+    )
+    backlog_task = Task.objects.create(
+        user=authenticated_user, title="Backlog", status=Task.BACKLOG
+    )
+    Task.objects.update(updated_at=timezone.now() - timedelta(days=16))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        result = move_old_tasks_to_backlogs_periodic()
+
+    assert result == "Moved 3 old tasks to backlogs"
+
+    for task in stale_tasks:
+        task.refresh_from_db()
+        assert task.status == Task.BACKLOG
+        assert task.history.first().status == Task.BACKLOG
+    completed_task.refresh_from_db()
+    assert completed_task.status != Task.BACKLOG
+    # already in the backlogs, nothing to change
+    backlog_task.refresh_from_db()
+    assert backlog_task.updated_at < timezone.now() - timedelta(days=15)
+    assert sorted(notifications, key=lambda n: n[0]) == sorted(
+        [
+            (
+                f"tasks_user_{authenticated_user.pk}",
+                {
+                    "type": "tasks_status_changed",
+                    "status": Task.BACKLOG,
+                    "ids": [stale_tasks[0].id, stale_tasks[2].id],
+                },
+            ),
+            (
+                f"tasks_user_{other_user.pk}",
+                {
+                    "type": "tasks_status_changed",
+                    "status": Task.BACKLOG,
+                    "ids": [stale_tasks[1].id],
+                },
+            ),
+        ],
+        key=lambda n: n[0],
+    )
+
+
+@pytest.mark.integration
+def test_rollover_moves_tasks_of_zones_past_midnight(
+    authenticated_user, monkeypatch, django_capture_on_commit_callbacks
+):
+    """Test that zones roll over once per local day & catch up missed days"""
+    notifications = []
+    monkeypatch.setattr(apps.core.publisher, "send_now", notifications.extend)
+    now = timezone.now()
+    tz = ZoneInfo("Asia/Kolkata")
+    rolled_tz = ZoneInfo("America/Chicago")
+    today = now.astimezone(tz).date()
+    authenticated_user.timezone = tz
+    authenticated_user.save()
+    rolled_user = User.objects.create_user(email="rolled@example.com", password="x")
+    rolled_user.timezone = rolled_tz
+    rolled_user.save()
+    # the run of yesterday was missed, the other zone is done for today
+    TimezoneRollover.objects.create(
+        timezone=str(tz), rolled_over_through=today - timedelta(days=2)
+    )
+    TimezoneRollover.objects.create(
+        timezone=str(rolled_tz), rolled_over_through=now.astimezone(rolled_tz).date()
+    )
+
+    def create_task(user, tz, days_ago, **kwargs):
+        start_at = datetime.datetime.combine(
+            now.astimezone(tz).date() - timedelta(days=days_ago),
+            datetime.time(9),
+            tzinfo=tz,
+        )
+        return Task.objects.create(
+            user=user,
+            title="Task",
+            status=Task.ON_BOARD,
+            start_at=start_at,
+            end_at=start_at + timedelta(hours=1),
+            **kwargs,
+        )
+
+    moved_tasks = [create_task(authenticated_user, tz, days) for days in (1, 2)]
+    completed_task = create_task(authenticated_user, tz, 1, is_completed=True)
+    older_task = create_task(authenticated_user, tz, 3)
+    rolled_task = create_task(rolled_user, rolled_tz, 1)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        result = move_yesterday_task_to_today_periodic()
+
+    assert result == "Moved 2 tasks across all users"
+    for task in moved_tasks:
+        task.refresh_from_db()
+        assert task.start_at == datetime.datetime.combine(
+            today, datetime.time(9), tzinfo=tz
+        )
+        assert task.end_at == task.start_at + timedelta(hours=1)
+        assert task.history.count() == 2
+    for task in (completed_task, older_task, rolled_task):
+        start_at = task.start_at
+        task.refresh_from_db()
+        assert task.start_at == start_at
+    assert len(notifications) == 1
+    group, event = notifications[0]
+    assert group == f"tasks_user_{authenticated_user.pk}"
+    assert {task["id"] for task in event["frame"]["data"]} == {
+        task.id for task in moved_tasks
+    }
+    assert TimezoneRollover.objects.get(timezone=str(tz)).rolled_over_through == today
+
+    # later runs of the same local day leave the zone alone
+    create_task(authenticated_user, tz, 1)
+    assert move_yesterday_task_to_today_periodic() == "Moved 0 tasks across all users"
+    # migration 0017 schedules the job hourly
+    schedule = PeriodicTask.objects.get(task="move_yesterday_task_to_today_periodic")
+    assert (schedule.crontab.minute, schedule.crontab.hour) == ("0", "*")
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_rollover_keeps_local_time_across_dst():
+    """Test that tasks keep their wall clock time when the offset changes"""
+    tz = ZoneInfo("America/New_York")
+    user = User.objects.create_user(email="dst@example.com", password="x")
+    user.timezone = tz
+    user.save()
+    # New York moves its clocks forward in the night to 2030-03-10
+    start_at = datetime.datetime(2030, 3, 9, 9, 0, tzinfo=tz)
+    task = Task.objects.create(
+        user=user,
+        title="Task",
+        status=Task.ON_CAL,
+        start_at=start_at,
+        end_at=start_at + timedelta(minutes=30),
+    )
+
+    assert roll_over_timezone(tz, datetime.date(2030, 3, 10)) == {user.pk: [task.id]}
+
+    task.refresh_from_db()
+    assert task.start_at == datetime.datetime(2030, 3, 10, 9, 0, tzinfo=tz)
+    assert task.start_at - start_at == timedelta(hours=23)
+    assert task.end_at == task.start_at + timedelta(minutes=30)
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_publish_queues_on_commit_and_falls_back_to_celery(
+    monkeypatch, django_capture_on_commit_callbacks
+):
+    """Test that events are queued on commit, via celery if the layer is down"""
+    sent, queued = [], []
+    fell_back = threading.Event()
+
+    async def apublish_many(messages):
+        await asyncio.sleep(0.2)
+        sent.extend(messages)
+        raise ConnectionError("channel layer down")
+
+    def delay(group, data):
+        queued.append((group, data))
+        if len(queued) == 2:
+            fell_back.set()
+
+    monkeypatch.setattr(apps.core.publisher, "apublish_many", apublish_many)
+    monkeypatch.setattr(notify_frontend, "delay", delay)
+    event = {"type": "full_refresh"}
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        publish_many([("tasks_user_1", event), ("tasks_user_2", event)])
+        assert sent == []
+
+    # the commit doesn't wait for the channel layer
+    assert len(callbacks) == 1
+    assert sent == queued == []
+    assert fell_back.wait(timeout=5)
+    assert sent == queued == [("tasks_user_1", event), ("tasks_user_2", event)]
+
+
+@pytest.mark.unit
+def test_frame_coalescer_merges_consecutive_frames():
+    """Test that pushed frames of the same kind merge into one, ids deduped"""
+    reset_notification_stats()
+    coalescer = FrameCoalescer()
+    task_v1, task_v2, other = {"id": 1, "v": 1}, {"id": 1, "v": 2}, {"id": 2}
+    first = {
+        "type": "task.refresh_for_rec",
+        "data": {"deleted": [5], "created": [task_v1, other]},
+    }
+    coalescer.add(first)
+    coalescer.add(
+        {
+            "type": "task.refresh_for_rec",
+            "data": {"deleted": [5, 2], "created": [task_v2]},
+        }
+    )
+    coalescer.add({"type": "tasks.status_changed", "status": "BACKLOG", "ids": [3]})
+    coalescer.add({"type": "tasks.status_changed", "status": "BACKLOG", "ids": [3, 4]})
+    coalescer.add({"type": "task_updated", "data": task_v1})
+
+    assert coalescer.drain() == [
+        {
+            "type": "task.refresh_for_rec",
+            "data": {"deleted": [5, 2], "created": [task_v2]},
+        },
+        {"type": "tasks.status_changed", "status": "BACKLOG", "ids": [3, 4]},
+        {"type": "task_updated", "data": task_v1},
+    ]
+    # frames may be shared by connections, merging must not change them
+    assert first["data"] == {"deleted": [5], "created": [task_v1, other]}
+
+    # a full refresh supersedes everything else in the window
+    coalescer.add({"type": "task_updated", "data": task_v1})
+    coalescer.add({"type": "full_refresh"})
+    coalescer.add({"type": "task_updated", "data": task_v2})
+    assert coalescer.drain() == [{"type": "full_refresh"}]
+    assert coalescer.drain() == []
+
+    assert get_notification_stats() == {
+        "events_in": 8,
+        "frames_out": 4,
+        "coalesced_rate": 0.5,
+    }
+
+
+@pytest.mark.unit
+def test_compressed_frames_only_for_opted_in_clients(settings):
+    """Test that big frames are sent deflated once the client asked for it"""
+    settings.WS_COMPRESSION_THRESHOLD = 1000
+    big_frame = {"type": "tasks.list", "data": [{"title": "Task"}] * 100}
+
+    def frames_sent(query_string, *frames, encode_frame=None):
+        consumer = TasksConsumer()
+        consumer.scope = {"query_string": query_string}
+        if encode_frame:
+            consumer.encode_frame = encode_frame
+        sent = []
+
+        async def send(text_data=None, bytes_data=None, close=False):
+            sent.append(text_data if text_data is not None else bytes_data)
+
+        consumer.send = send
+        compression = consumer.negotiate_compression()
+        for frame in frames:
+            async_to_sync(consumer.send_json)(frame)
+        return compression, sent
+
+    compression, sent = frames_sent(b"compression=deflate", {"type": "x"}, big_frame)
+    assert compression == "deflate"
+    assert json.loads(sent[0]) == {"type": "x"}
+    assert isinstance(sent[1], bytes)
+    assert json.loads(zlib.decompress(sent[1])) == big_frame
+
+    compression, sent = frames_sent(b"", big_frame)
+    assert compression is None
+    assert json.loads(sent[0]) == big_frame
+
+    # the threshold counts bytes, not characters
+    async def encode_unicode(content):
+        return json.dumps(content, ensure_ascii=False)
+
+    unicode_frame = {"title": "ü" * 600}
+    _, sent = frames_sent(
+        b"compression=deflate", unicode_frame, encode_frame=encode_unicode
+    )
+    assert json.loads(zlib.decompress(sent[0])) == unicode_frame
+
+
+@pytest.mark.unit
+def test_msgpack_frames_use_field_codes_and_skip_nulls():
+    """Test that MessagePack frames shorten task keys & leave out nulls"""
+    task = {
+        "id": 1,
+        "title": "Task",
+        "end_at": None,
+        "tags": ["work"],
+        "project": {"id": 2, "title": "Project", "description": None},
+    }
+    frame = {"type": "task.updated", "data": task}
+
+    packed = pack_frame(frame)
+
+    # nested dicts keep their keys & nulls
+    assert msgpack.unpackb(packed) == {
+        "type": "task.updated",
+        "data": {
+            "i": 1,
+            "t": "Task",
+            "tg": ["work"],
+            "p": {"id": 2, "title": "Project", "description": None},
+        },
+    }
+    assert unpack_frame(packed) == {
+        "type": "task.updated",
+        "data": {k: v for k, v in task.items() if v is not None},
+    }
+    # only the tasks of `data` are translated
+    frame = {
+        "type": "task.refresh_for_rec",
+        "data": {"created": [task], "deleted": [3]},
+        "status": "ON_BOARD",
+    }
+    packed = msgpack.unpackb(pack_frame(frame))
+    assert packed["status"] == "ON_BOARD"
+    assert packed["data"]["deleted"] == [3]
+    assert packed["data"]["created"][0]["t"] == "Task"
+
+    # actions sent as MessagePack reach the handlers with full field names
+    consumer = TasksConsumer()
+    consumer.wire_format = "msgpack"
+    received = []
+
+    async def receive_json(content, **kwargs):
+        received.append(content)
+
+    consumer.receive_json = receive_json
+    action = {"action": "update_task", "payload": {"id": 1, "t": "keep my key"}}
+    async_to_sync(consumer.receive)(bytes_data=msgpack.packb(action))
+    assert received == [action]
+
+
+@pytest.mark.unit
+def test_actions_run_concurrently_but_in_order_per_task():
+    """Test that a slow action only holds back later actions on its tasks & reads"""
+    consumer = TasksConsumer()
+    consumer.action_slots = asyncio.Semaphore(4)
+    consumer.action_tails = {}
+    consumer.action_tasks = set()
+    consumer.coalescer = FrameCoalescer()
+    consumer.send_lock = asyncio.Lock()
+    sent = []
+
+    async def send_json(frame):
+        sent.append((frame["request_id"], frame["data"]))
+
+    async def handle_update_task(task_data):
+        await asyncio.sleep(task_data.get("delay", 0))
+        return {"type": "task.updated", "data": task_data["title"]}
+
+    consumer.send_json = send_json
+    consumer.handle_update_task = handle_update_task
+
+    async def receive_all():
+        for request_id, payload in enumerate(
+            [
+                {"id": 1, "title": "slow", "delay": 0.2},
+                {"id": 2, "title": "other task"},
+                {"id": 1, "title": "after slow"},
+            ]
+        ):
+            await consumer.receive_json(
+                {"action": "update_task", "payload": payload, "request_id": request_id}
+            )
+        await asyncio.gather(*consumer.action_tasks)
+
+    async_to_sync(receive_all)()
+
+    assert sent == [(1, "other task"), (0, "slow"), (2, "after slow")]
+    assert consumer.action_tails == {}
+
+    # a fetch waits for the writes sent before it, whatever tasks they touch
+    sent.clear()
+
+    async def handle_fetch_tasks(filters):
+        return {"type": "tasks.list", "data": "board"}
+
+    consumer.handle_fetch_tasks = handle_fetch_tasks
+
+    async def write_then_fetch():
+        await consumer.receive_json(
+            {
+                "action": "update_task",
+                "payload": {"id": 3, "title": "slow", "delay": 0.1},
+                "request_id": 3,
+            }
+        )
+        await consumer.receive_json(
+            {"action": "fetch_tasks", "payload": {}, "request_id": 4}
+        )
+        await asyncio.gather(*consumer.action_tasks)
+
+    async_to_sync(write_then_fetch)()
+
+    assert sent == [(3, "slow"), (4, "board")]
+
+
+@pytest.mark.unit
+def test_malformed_actions_release_their_slot_and_order_updates_are_acked():
+    """Test that bad payloads don't leak action slots & order updates reply"""
+    consumer = TasksConsumer()
+    consumer.action_slots = asyncio.Semaphore(1)
+    consumer.action_tails = {}
+    consumer.action_tasks = set()
+    consumer.coalescer = FrameCoalescer()
+    consumer.send_lock = asyncio.Lock()
+    consumer.user = User(id=1)
+    ordered = []
+    consumer.task_service = type(
+        "TaskService", (), {"bulk_update_task_order": lambda self, t: ordered.append(t)}
+    )()
+    sent = []
+
+    async def send_json(frame):
+        sent.append(frame)
+
+    consumer.send_json = send_json
+
+    async def receive_all():
+        for request_id, (action, payload) in enumerate(
+            [
+                ("bulk_delete", {"ids": None}),
+                ("bulk_delete", {"ids": 5}),
+                ("update_task_order", [{"id": 2}, {"id": "rec-1-2030-01-02"}]),
+            ]
+        ):
+            await asyncio.wait_for(
+                consumer.receive_json(
+                    {"action": action, "payload": payload, "request_id": request_id}
+                ),
+                timeout=1,
+            )
+            await asyncio.gather(*consumer.action_tasks)
+
+    async_to_sync(receive_all)()
+
+    assert [(f["type"], f["request_id"]) for f in sent] == [
+        ("error", 0),
+        ("error", 1),
+        ("tasks.order_updated", 2),
+    ]
+    assert sent[2]["ids"] == [2, "rec-1-2030-01-02"]
+    assert ordered == [[{"id": 2}, {"id": "rec-1-2030-01-02"}]]
+
+
+@pytest.mark.unit
+def test_blocking_sync_work_of_actions_runs_in_parallel():
+    """Test that a blocked sync handler doesn't hold back other actions"""
+    consumer = TasksConsumer()
+    consumer.action_slots = asyncio.Semaphore(4)
+    consumer.action_tails = {}
+    consumer.action_tasks = set()
+    consumer.coalescer = FrameCoalescer()
+    consumer.send_lock = asyncio.Lock()
+    sent = []
+    # only passed once both actions' sync work runs at the same time
+    both_running = threading.Barrier(2, timeout=5)
+
+    async def send_json(frame):
+        sent.append(frame)
+
+    @action_sync_to_async
+    def handle_update_task(task_data):
+        both_running.wait()
+        return {"type": "task.updated", "data": task_data["id"]}
+
+    consumer.send_json = send_json
+    consumer.handle_update_task = handle_update_task
+
+    async def receive_all():
+        for task_id in (1, 2):
+            await consumer.receive_json(
+                {"action": "update_task", "payload": {"id": task_id}}
+            )
+        await asyncio.gather(*consumer.action_tasks)
+
+    async_to_sync(receive_all)()
+
+    assert sorted(frame["data"] for frame in sent) == [1, 2]
+
+
+@pytest.mark.unit
+def test_held_frames_are_sent_before_action_replies(settings):
+    """Test that a reply isn't followed by an older held back frame"""
+    settings.NOTIFY_COALESCE_WINDOW = 10
+    consumer = TasksConsumer()
+    consumer.action_slots = asyncio.Semaphore(4)
+    consumer.action_tails = {}
+    consumer.action_tasks = set()
+    consumer.coalescer = FrameCoalescer()
+    consumer.flush_task = None
+    consumer.send_lock = asyncio.Lock()
+    sent = []
+
+    async def send_json(frame):
+        sent.append(frame["type"])
+
+    async def handle_update_task(task_data):
+        return {"type": "task.updated", "data": task_data}
+
+    consumer.send_json = send_json
+    consumer.handle_update_task = handle_update_task
+
+    async def push_then_act():
+        await consumer.task_updated({"type": "task_updated", "data": {"id": 1}})
+        await consumer.receive_json({"action": "update_task", "payload": {"id": 1}})
+        await asyncio.gather(*consumer.action_tasks)
+        consumer.flush_task.cancel()
+
+    async_to_sync(push_then_act)()
+
+    assert sent == ["task_updated", "task.updated"]
+    assert consumer.coalescer.frames == []
+
+
+# Query plan regression tests
+def _assert_uses_index(queryset, index_name: str):
+    """
+    Explain `queryset` with sequential scans disabled & fail unless the plan
+    uses `index_name`. Any index would avoid the seq scan (e.g. the FK index
+    on `user_id`), so the index is checked by name.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+    plan = queryset.explain()
+    assert index_name in plan, plan
+
+
+@pytest.mark.integration
+def test_board_queries_use_indexes(authenticated_user):
+    """Test that the board, recurrence & periodic job queries hit an index."""
+    if connection.vendor != "postgresql":
+        pytest.skip("EXPLAIN plans are only checked on PostgreSQL")
+
+    series = RecurrenceSeries.objects.create(recurrence_rule="FREQ=DAILY")
+    recurring_task = Task.objects.create(
+        user=authenticated_user,
+        title="Recurring Task",
+        start_at=timezone.now(),
+        recurrence_series=series,
+    )
+    cutoff = timezone.now() - timedelta(days=15)
+
+    # board column of a user
+    _assert_uses_index(
+        Task.objects.filter(user=authenticated_user, status=Task.ON_BOARD).order_by(
+            "start_at", "order"
+        ),
+        "task_user_status_start_idx",
+    )
+    # recurring siblings
+    _assert_uses_index(get_future_siblings(recurring_task), "task_series_start_idx")
+    # archive_old_tasks_periodic
+    _assert_uses_index(
+        Task.objects.filter(updated_at__lt=cutoff).exclude(status=Task.ARCHIVED),
+        "task_live_updated_idx",
+    )
+    # move_old_tasks_to_backlogs_periodic
+    _assert_uses_index(
+        Task.objects.filter(
+            updated_at__lt=cutoff,
+            is_completed=False,
+            recurrence_series__isnull=True,
+        ).exclude(status__in=[Task.ARCHIVED, Task.BACKLOG]),
+        "task_live_updated_idx",
+    )
+    # move_yesterday_task_to_today_periodic
+    _assert_uses_index(
+        Task.objects.filter(
+            user__timezone=authenticated_user.timezone,
+            status__in=[Task.ON_BOARD, Task.ON_CAL],
+            is_completed=False,
+            start_at__gte=cutoff,
+            start_at__lt=cutoff + timedelta(days=1),
+            recurrence_series__isnull=True,
+        ).exclude(status=Task.ARCHIVED),
+        "task_open_user_start_idx",
+    )
+    # full text search
+    _assert_uses_index(
+        Task.objects.filter(
+            user=authenticated_user,
+            search_vector=SearchQuery("invoice", config="english"),
+        ),
+        "task_search_vector_idx",
+    )
+    # title autocomplete
+    _assert_uses_index(
+        Task.objects.filter(
+            user=authenticated_user, title__trigram_word_similar="quartely"
+        ),
+        "task_title_trgm_idx",
+    )
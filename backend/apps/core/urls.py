@@ -6,6 +6,8 @@ from .views import (
     ProjectDetailApiView,
     assign_project_to_task,
     update_task_duration,
+    search_tasks,
+    autocomplete_titles,
 )
 
 app_name = "core"
@@ -25,4 +27,6 @@ urlpatterns = [
     path("projects/<int:pk>/", ProjectDetailApiView.as_view(), name="project_detail"),
     path("projects/create/", create_project, name="create_project"),
     path("tags/", get_all_tags, name="tag_list"),
+    path("tasks/search/", search_tasks, name="task_search"),
+    path("autocomplete/", autocomplete_titles, name="autocomplete_titles"),
 ]
@@ -11,9 +11,17 @@ from django.views.decorators.csrf import csrf_protect
 from taggit.models import Tag, TaggedItem
 from django.db import transaction
 import logging
-from .tasks import notify_frontend
+from .publisher import publish
 from datetime import timedelta
-from .services import save_task
+from .services import save_task, touch_tasks
+from .selectors import (
+    AUTOCOMPLETE_LIMIT,
+    SEARCH_RESULTS_LIMIT,
+    autocomplete_titles_for_user,
+    get_projects_for_user,
+    search_tasks_for_user_serialized,
+)
+from .cache import get_or_load_autocomplete, invalidate_board_cache
 
 logger = logging.getLogger(__name__)
 # Create your views here.
@@ -37,7 +45,7 @@ def update_task_duration(request):
             task.end_at = task.start_at + task.duration  # type:ignore
         save_task(task)
         serialized_task = TaskSerializer(task).data
-        notify_frontend.delay(  # type: ignore
+        publish(
             f"tasks_user_{task.user.pk}",
             {
                 "type": "task_updated",
@@ -74,7 +82,7 @@ def get_all_projects(request):
     Get all projects
     """
     logger.info(f"Fetching projects for user_id={request.user.id}")
-    projects = Project.objects.filter(user=request.user)
+    projects = get_projects_for_user(request.user.id)
     logger.info(f"Found {projects.count()} projects for user_id={request.user.id}")
     serializer = ProjectSerializer(projects, many=True)
     return Response(serializer.data)
@@ -102,6 +110,8 @@ class ProjectDetailApiView(LoginRequiredMixin, APIView):
         if serializer.is_valid():
             with transaction.atomic():
                 serializer.save()
+                # tasks embed their project, so they changed as well
+                touch_tasks(project.tasks.all(), request.user.id)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -109,6 +119,8 @@ class ProjectDetailApiView(LoginRequiredMixin, APIView):
         logger.info(f"Deleting project: project_id={pk} by user_id={request.user.id}")
         project = get_object_or_404(Project, pk=pk, user=request.user)
         with transaction.atomic():
+            # tasks get detached by a bulk update, so stamp them for delta sync
+            touch_tasks(project.tasks.all(), request.user.id)
             project.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -125,10 +137,53 @@ def create_project(request):
     if serializer.is_valid():
         with transaction.atomic():
             serializer.save()
+            # new project has to show up in cached autocomplete results
+            invalidate_board_cache(request.user.id)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(["GET"])
+@login_required
+def search_tasks(request):
+    """
+    Full text search over the user's tasks, `?q=<query>&limit=<n>`
+    """
+    query = request.query_params.get("q", "")
+    logger.info(f"Searching tasks: query={query!r} by user_id={request.user.id}")
+    try:
+        tasks_data = search_tasks_for_user_serialized(
+            request.user.id,
+            query,
+            request.query_params.get("limit", SEARCH_RESULTS_LIMIT),
+        )
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(tasks_data)
+
+
+@api_view(["GET"])
+@login_required
+def autocomplete_titles(request):
+    """
+    Typo tolerant task & project title matches while typing, `?q=<query>`
+    """
+    query = request.query_params.get("q", "")
+    try:
+        limit = int(request.query_params.get("limit", AUTOCOMPLETE_LIMIT))
+    except ValueError:
+        return Response(
+            {"error": "limit must be a number"}, status=status.HTTP_400_BAD_REQUEST
+        )
+    limit = min(max(limit, 1), AUTOCOMPLETE_LIMIT)
+    results = get_or_load_autocomplete(
+        request.user.id,
+        f"{limit}:{query}",
+        lambda: autocomplete_titles_for_user(request.user.id, query, limit),
+    )
+    return Response(results)
+
+
 @api_view(["GET"])
 @login_required
 def get_all_tags(request):
@@ -0,0 +1,99 @@
+"""
+Optional MessagePack wire format of the tasks websocket.
+
+Clients connecting with `?format=msgpack` get `"format": "msgpack"` & the
+`field_codes` table in the (JSON) `connected` message, every later frame is
+a binary MessagePack map. Only the tasks of a frame's `data` (a task, a list
+of tasks or the `created` tasks of a recurrence refresh) have their keys
+replaced by the short codes of `FIELD_CODES` & their `None` values left out,
+a missing key means `null`. Nested dicts & everything else keep their keys.
+Clients may send their actions as MessagePack maps with full key names.
+
+With compression negotiated too (see `apps.core.compression`), big frames are
+deflated MessagePack: zlib frames start with `0x78`, MessagePack maps never do.
+"""
+
+from urllib.parse import parse_qs
+import msgpack
+
+MSGPACK_FORMAT = "msgpack"
+
+# short codes of the keys repeated in every task dict
+FIELD_CODES = {
+    "id": "i",
+    "frontend_id": "fi",
+    "title": "t",
+    "description": "de",
+    "order": "o",
+    "is_completed": "c",
+    "status": "s",
+    "created_at": "ca",
+    "updated_at": "ua",
+    "duration": "du",
+    "duration_display": "dd",
+    "start_at": "sa",
+    "end_at": "ea",
+    "tags": "tg",
+    "project": "p",
+    "project_id": "pi",
+    "recurrence_series": "rs",
+    "recurrence_rule": "rr",
+    "virtual_id": "vi",
+}
+FIELD_NAMES = {code: name for name, code in FIELD_CODES.items()}
+
+
+def _encode_task(task: dict) -> dict:
+    return {FIELD_CODES.get(k, k): v for k, v in task.items() if v is not None}
+
+
+def _decode_task(task: dict) -> dict:
+    return {FIELD_NAMES.get(k, k): v for k, v in task.items()}
+
+
+def _map_tasks(content, translate):
+    """`content` with `translate` applied to the tasks of its `data`"""
+    data = content.get("data") if isinstance(content, dict) else None
+    if isinstance(data, list):
+        data = [translate(t) if isinstance(t, dict) else t for t in data]
+    elif isinstance(data, dict) and "created" in data:
+        data = {**data, "created": [translate(t) for t in data["created"]]}
+    elif isinstance(data, dict):
+        data = translate(data)
+    else:
+        return content
+    return {**content, "data": data}
+
+
+def pack_frame(content) -> bytes:
+    return msgpack.packb(_map_tasks(content, _encode_task))  # type:ignore
+
+
+def unpack_frame(data: bytes):
+    """Frame packed by `pack_frame`, as clients decode it"""
+    return _map_tasks(msgpack.unpackb(data), _decode_task)
+
+
+class MsgpackMixin:
+    """
+    Mix into a consumer using `CompressedJsonMixin`, before it. Activate the
+    negotiated format once the `connected` message is sent.
+    """
+
+    wire_format: str = "json"
+
+    def negotiate_wire_format(self) -> str:
+        """Format asked for in the query string, if supported"""
+        query = parse_qs(self.scope.get("query_string", b"").decode())  # type:ignore
+        return MSGPACK_FORMAT if MSGPACK_FORMAT in query.get("format", []) else "json"
+
+    async def encode_frame(self, content) -> str | bytes:
+        if self.wire_format == MSGPACK_FORMAT:
+            return pack_frame(content)
+        return await super().encode_frame(content)  # type:ignore
+
+    async def receive(self, text_data=None, bytes_data=None, **kwargs):
+        if bytes_data and self.wire_format == MSGPACK_FORMAT:
+            await self.receive_json(msgpack.unpackb(bytes_data), **kwargs)  # type:ignore
+        else:
+            await super().receive(text_data, bytes_data, **kwargs)  # type:ignore
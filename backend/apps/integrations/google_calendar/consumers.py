@@ -4,6 +4,7 @@ from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.consumer import database_sync_to_async
 from .utils import build_calendar_service, format_event_for_fullcalendar
 from .models import GoogleCredentials
+from apps.core.compression import CompressedJsonMixin
 
 import re
 
@@ -11,12 +12,12 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
-class GoogleCalendarConsumer(AsyncJsonWebsocketConsumer):
+class GoogleCalendarConsumer(CompressedJsonMixin, AsyncJsonWebsocketConsumer):
     """WebSocket consumer dedicated to Google-Calendar events for a single user.
 
     • Fetches the latest events immediately on connect and pushes them to the client.
     • Joins a per-user channel-layer group (``gcal_user_<id>``) so that server-side
-      code/webhooks can fan-out incremental updates via ``notify_frontend``.
+      code/webhooks can fan-out incremental updates via ``apps.core.publisher``.
     """
 
     async def connect(self):  # type: ignore
@@ -38,7 +39,11 @@ class GoogleCalendarConsumer(AsyncJsonWebsocketConsumer):
 
         # send connected ack with connection status
         await self.send_json(
-            {"type": "connected", "google_calendar_connected": self.has_google_calendar}
+            {
+                "type": "connected",
+                "google_calendar_connected": self.has_google_calendar,
+                "compression": self.negotiate_compression(),
+            }
         )
 
     async def disconnect(self, code):
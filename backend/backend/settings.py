@@ -47,6 +47,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 ]
 
 THIRD_PARTY_APPS = [
@@ -289,6 +290,46 @@ LOGGING = {
     },
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # serialized task boards per user, see apps.core.cache
+    "task_boards": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_CONNECTION_URL,
+        "KEY_PREFIX": "task_boards",
+        "TIMEOUT": 60 * 10,  # 10 minutes
+    },
+}
+# boards with more tasks than this are not cached, keeps cache memory bounded
+BOARD_CACHE_MAX_TASKS = env("BOARD_CACHE_MAX_TASKS", cast=int, default=2000)
+
+# expand recurring series into virtual occurrences when boards are read instead
+# of creating their tasks ahead of time, an occurrence becomes a real task once
+# the user changes it
+VIRTUAL_RECURRENCE = env("VIRTUAL_RECURRENCE", cast=bool, default=False)
+# window of virtual occurrences sent when a board fetch has no date range
+VIRTUAL_RECURRENCE_DAYS_AHEAD = env(
+    "VIRTUAL_RECURRENCE_DAYS_AHEAD", cast=int, default=20
+)
+
+# "direct" sends realtime events from the process to the channel layer,
+# "celery" hands them to the `notify_frontend` task, see apps.core.publisher
+REALTIME_PUBLISH_MODE = env("REALTIME_PUBLISH_MODE", default="direct")
+
+# seconds websocket connections hold back server pushed frames to merge them
+# with the ones following, 0 sends every frame right away
+NOTIFY_COALESCE_WINDOW = env("NOTIFY_COALESCE_WINDOW", cast=float, default=0.2)
+
+# websocket frames of at least this many bytes are sent zlib compressed to
+# clients which opted in, see apps.core.compression
+WS_COMPRESSION_THRESHOLD = env("WS_COMPRESSION_THRESHOLD", cast=int, default=16_384)
+WS_COMPRESSION_LEVEL = env("WS_COMPRESSION_LEVEL", cast=int, default=6)
+
+# actions of one tasks websocket connection processed at the same time
+WS_MAX_CONCURRENT_ACTIONS = env("WS_MAX_CONCURRENT_ACTIONS", cast=int, default=4)
+
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
@@ -0,0 +1,38 @@
+"""
+Settings for running the test suite, see pytest.ini.
+
+Uses the regular settings with defaults for the required environment variables
+and in-memory caches & channel layer, so only the database has to be running.
+"""
+
+import os
+
+os.environ.setdefault("DEBUG", "True")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("CORS_ALLOWED_ORIGINS", "http://localhost:5173")
+os.environ.setdefault("CSRF_TRUSTED_ORIGINS", "http://localhost:5173")
+os.environ.setdefault("ALLOWED_HOSTS", "localhost,testserver")
+
+from .settings import *  # noqa: E402, F401, F403
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "task_boards": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "task_boards",
+        "TIMEOUT": 60 * 10,
+    },
+}
+
+CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": "channels.layers.InMemoryChannelLayer",
+    },
+}
+
+# hashing passwords properly only slows down creating test users
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+CELERY_TASK_ALWAYS_EAGER = True
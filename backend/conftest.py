@@ -0,0 +1,86 @@
+import datetime
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.models import Project, Task
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_data():
+    return {"email": "testuser@example.com", "password": "testpassword123"}
+
+
+@pytest.fixture
+def authenticated_user(db, user_data):
+    return get_user_model().objects.create_user(
+        email=user_data["email"], password=user_data["password"]
+    )
+
+
+@pytest.fixture
+def authenticated_client(api_client, authenticated_user):
+    api_client.force_authenticate(user=authenticated_user)
+    api_client.force_login(authenticated_user)
+    return api_client
+
+
+@pytest.fixture
+def project(authenticated_user):
+    return Project.objects.create(
+        user=authenticated_user,
+        title="Test Project",
+        description="This is a test project",
+    )
+
+
+@pytest.fixture
+def task(authenticated_user, project):
+    return Task.objects.create(
+        user=authenticated_user,
+        project=project,
+        title="Test Task",
+        description="This is a test task",
+        order=1,
+        duration=datetime.timedelta(minutes=30),
+    )
+
+
+@pytest.fixture
+def kanban_task(authenticated_user):
+    return Task.objects.create(
+        user=authenticated_user,
+        title="Kanban Task",
+        order=2,
+        status=Task.ON_BOARD,
+        start_at=timezone.now(),
+    )
+
+
+@pytest.fixture
+def calendar_task(authenticated_user):
+    return Task.objects.create(
+        user=authenticated_user,
+        title="Calendar Task",
+        order=3,
+        status=Task.ON_CAL,
+        start_at=timezone.now(),
+        duration=datetime.timedelta(hours=1),
+    )
+
+
+@pytest.fixture
+def completed_task(authenticated_user):
+    return Task.objects.create(
+        user=authenticated_user,
+        title="Completed Task",
+        order=4,
+        is_completed=True,
+    )
@@ -3,11 +3,12 @@ import { useAuthStore } from './authStore'
 import { useWebSocket } from '@vueuse/core'
 import { watch, ref } from 'vue'
 import { getDateStrFromDateObj } from '../../src/utils/taskUtils'
+import { parseWsFrame, wsCompressionQuery } from '../utils/wsFrames'
 
 export const useCalendarStore = defineStore('calendar', () => {
   const host = import.meta.env.PROD ? import.meta.env.VITE_API_BASE_URL || 'tymr.online' : 'localhost:8000'
   const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws'
-  const wsUrl = `${protocol}://${host}/ws/gcal/`
+  const wsUrl = `${protocol}://${host}/ws/gcal/${wsCompressionQuery()}`
   const {
     status: gcalWsStatus,
     data: gcalWsData,
@@ -148,18 +149,22 @@ export const useCalendarStore = defineStore('calendar', () => {
   }
 
   // watch incoming data
+  // inflating compressed frames is async, keep messages in arrival order
+  let pendingFrames = Promise.resolve()
   watch(gcalWsData, (raw) => {
     if (!raw) return
-    let msg
-    try {
-      msg = JSON.parse(raw.data ?? raw)
-    } catch {
-      console.error('[CalendarStore GCAL WS] invalid JSON:', raw)
-      return
-    }
-    if (msg) {
-      routeGcalMessage(msg)
-    }
+    pendingFrames = pendingFrames.then(async () => {
+      let msg
+      try {
+        msg = await parseWsFrame(raw.data ?? raw)
+      } catch {
+        console.error('[CalendarStore GCAL WS] invalid JSON:', raw)
+        return
+      }
+      if (msg) {
+        routeGcalMessage(msg)
+      }
+    })
   })
   function initGcalWs() {
     // Only initialize WebSocket when Google Calendar is connected
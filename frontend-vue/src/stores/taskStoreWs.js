@@ -14,12 +14,13 @@ import {
   upsertTasks,
 } from '../utils/taskUtils'
 import { tasksToFcEvents } from '../utils/calendarSerializer'
+import { parseWsFrame, wsCompressionQuery } from '../utils/wsFrames'
 
 export const useTaskStoreWs = defineStore('taskStoreWs', () => {
   // Build WebSocket URL
   const host = import.meta.env.PROD ? import.meta.env.VITE_API_BASE_URL || 'tymr.online' : 'localhost:8000'
   const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws'
-  const wsUrl = computed(() => `${protocol}://${host}/ws/tasks/`)
+  const wsUrl = computed(() => `${protocol}://${host}/ws/tasks/${wsCompressionQuery()}`)
 
   // Initialize WebSocket with vueuse
   const {
@@ -47,6 +48,7 @@ export const useTaskStoreWs = defineStore('taskStoreWs', () => {
   const lastDate = ref(addDays(today(), 5))
   const minDate = ref(subDays(today(), 7))
   const localCalendarTaskInFcFormat = ref([])
+  const searchResults = ref([])
 
   watch(
     kanbanColumns,
@@ -76,18 +78,22 @@ export const useTaskStoreWs = defineStore('taskStoreWs', () => {
   // ---------------------
   // Handle incoming messages (tasks ws)
   // ---------------------
+  // inflating compressed frames is async, keep messages in arrival order
+  let pendingFrames = Promise.resolve()
   watch(wsData, (raw) => {
     if (!raw) return
-    let msg
-    try {
-      msg = JSON.parse(raw.data ?? raw)
-    } catch {
-      console.error('[WS] invalid JSON:', raw)
-      return
-    }
-    if (msg) {
-      routeMessage(msg)
-    }
+    pendingFrames = pendingFrames.then(async () => {
+      let msg
+      try {
+        msg = await parseWsFrame(raw.data ?? raw)
+      } catch {
+        console.error('[WS] invalid JSON:', raw)
+        return
+      }
+      if (msg) {
+        routeMessage(msg)
+      }
+    })
   })
 
   function assignTasksToBoard(tasks) {
@@ -164,6 +170,11 @@ export const useTaskStoreWs = defineStore('taskStoreWs', () => {
 
   // handle msg from backend
   function routeMessage(msg) {
+    if (isSupersededReply(msg)) {
+      // e.g. a fetch for filters the user changed since, a newer one is on its way
+      console.info('[WS] dropping superseded reply:', msg.type, msg.request_id)
+      return
+    }
     switch (msg.type) {
       case 'connected': {
         console.info('fetching tasks after rec-d connected msg from backend')
@@ -198,6 +209,15 @@ export const useTaskStoreWs = defineStore('taskStoreWs', () => {
         }
         break
       }
+      case 'task.created_many': {
+        const newTasks = msg.data
+        const frontendIds = new Set(newTasks.map((t) => t.frontend_id))
+        // replace the optimistic copies with tasks from backend, keeping their order
+        brainDumpTasks.value = brainDumpTasks.value.filter((t) => !frontendIds.has(t.frontend_id))
+        brainDumpTasks.value.unshift(...newTasks.filter((t) => t.status === 'BRAINDUMP'))
+        updateTaskOrderWs(brainDumpTasks.value)
+        break
+      }
       case 'task.deleted': {
         const id = msg.id
         // purge from all
@@ -244,6 +264,42 @@ export const useTaskStoreWs = defineStore('taskStoreWs', () => {
         updateTaskOrderWs(taskColArr)
         break
       }
+      case 'task.moved': {
+        // only the moved task got a new rank, column is already in order on our side
+        _apply_updates_to_task(msg.data)
+        break
+      }
+      case 'tasks.search_results': {
+        searchResults.value = msg.data
+        break
+      }
+      case 'tasks.bulk_updated': {
+        // one frame for a whole multi-select action, possibly from another tab
+        msg.deleted.forEach((id) => _delete_task_from_all_cols(id))
+        msg.data.forEach((task) => {
+          // tasks may have changed column, so re-place them
+          _delete_task_from_all_cols(task.id)
+          _getColumnTasksFromColName(task.status, task.start_at).push(task)
+        })
+        break
+      }
+      case 'tasks.status_changed': {
+        // periodic jobs only send ids of the tasks they moved to another column
+        const ids = new Set(msg.ids)
+        const allTasks = [
+          ...kanbanColumns.value.flatMap((col) => col.tasks),
+          ...brainDumpTasks.value,
+          ...backlogs.value,
+          ...archivedTasks.value,
+        ]
+        allTasks
+          .filter((task) => ids.has(task.id))
+          .forEach((task) => {
+            _delete_task_from_all_cols(task.id)
+            _getColumnTasksFromColName(msg.status, task.start_at).push({ ...task, status: msg.status })
+          })
+        break
+      }
       case 'task.cal_task_updated': {
         console.log('executed task.cal_task_updated')
         const updatedTask = msg.data
@@ -255,6 +311,11 @@ export const useTaskStoreWs = defineStore('taskStoreWs', () => {
         break
       }
 
+      case 'tasks.order_updated': {
+        // the new order was applied locally before it was sent
+        break
+      }
+
       case 'error': {
         // Display error message using global snackbar if available
         let errorMessage = 'Oh no! Something went wrong. trust me bro! everything was okay when i tested it'
@@ -277,10 +338,26 @@ export const useTaskStoreWs = defineStore('taskStoreWs', () => {
     }
   }
 
+  // every action carries a request_id, the backend echoes it in the reply
+  let lastRequestId = 0
+  // latest request per read action, replies to older ones are stale
+  const latestReadRequestIds = {}
+  const READ_REPLY_ACTIONS = { 'tasks.list': 'fetch_tasks', 'tasks.search_results': 'search_tasks' }
+
+  function isSupersededReply(msg) {
+    const action = READ_REPLY_ACTIONS[msg.type]
+    return action !== undefined && msg.request_id !== undefined && msg.request_id < latestReadRequestIds[action]
+  }
+
   // Generic send helper
   function sendAction(action, payload = {}) {
     if (wsStatus.value === 'OPEN') {
-      wsSend(JSON.stringify({ action, payload }))
+      const request_id = ++lastRequestId
+      if (Object.values(READ_REPLY_ACTIONS).includes(action)) {
+        latestReadRequestIds[action] = request_id
+      }
+      wsSend(JSON.stringify({ action, payload, request_id }))
+      return request_id
     } else {
       console.info('[WS] not initialized, ws status yet:', wsStatus.value)
     }
@@ -289,7 +366,9 @@ export const useTaskStoreWs = defineStore('taskStoreWs', () => {
   function _apply_updates_to_task(updated_task) {
     // first find the column where the task is present
     const tasks_array = _getColumnTasksFromColName(updated_task.status, updated_task.start_at)
-    const task_index = tasks_array.findIndex((task) => task.id === updated_task.id)
+    // a changed virtual occurrence comes back as a real task with a new id
+    const task_id = updated_task.virtual_id ?? updated_task.id
+    const task_index = tasks_array.findIndex((task) => task.id === task_id)
     if (task_index === -1) {
       console.warn("task not found with id so it's a bug - ", updated_task.id)
       return
@@ -356,6 +435,15 @@ export const useTaskStoreWs = defineStore('taskStoreWs', () => {
     return sendAction('create_task', taskWithFormattedDuration)
   }
 
+  async function createTasksWs(tasks) {
+    // one round trip for a whole batch e.g. brain dump or import
+    const tasksWithFormattedDuration = tasks.map((task) => ({
+      ...task,
+      duration: formatDurationForAPI(task.duration),
+    }))
+    return sendAction('create_tasks', tasksWithFormattedDuration)
+  }
+
   async function updateTaskWs(task) {
     // Format duration before sending to API
     const taskWithFormattedDuration = {
@@ -397,6 +485,14 @@ export const useTaskStoreWs = defineStore('taskStoreWs', () => {
     reInitializeOrder(tasks_array)
     sendAction('update_task_order', tasks_array)
   }
+  function moveTaskWs(task, beforeTask, afterTask) {
+    // backend re-ranks only the moved task between its new neighbours
+    sendAction('move_task', {
+      id: task.id,
+      before_id: beforeTask ? beforeTask.id : null,
+      after_id: afterTask ? afterTask.id : null,
+    })
+  }
   function addMoreColumnsWs(c = 3) {
     addMoreColumnsForward(c)
   }
@@ -409,6 +505,23 @@ export const useTaskStoreWs = defineStore('taskStoreWs', () => {
   function assignProjectWs(tid, pid) {
     sendAction('assign_project', { task_id: tid, project_id: pid })
   }
+  function bulkCompleteWs(task_ids, is_completed = true) {
+    sendAction('bulk_complete', { ids: task_ids, is_completed })
+  }
+  function bulkDeleteWs(task_ids) {
+    sendAction('bulk_delete', { ids: task_ids })
+    task_ids.forEach((id) => _delete_task_from_all_cols(id))
+  }
+  function bulkMoveWs(task_ids, status, date = null) {
+    // date as `YYYY-MM-DD`, required for ON_BOARD & ON_CAL
+    sendAction('bulk_move', { ids: task_ids, status, date })
+  }
+  function bulkAssignProjectWs(task_ids, project_id) {
+    sendAction('bulk_assign_project', { ids: task_ids, project_id })
+  }
+  function searchTasksWs(query, limit = 50) {
+    sendAction('search_tasks', { query, limit })
+  }
   function deleteTaskWs(task_id) {
     sendAction('delete_task', task_id)
     // remove this task from UI
@@ -423,6 +536,7 @@ export const useTaskStoreWs = defineStore('taskStoreWs', () => {
     backlogs,
     archivedTasks,
     localCalendarTaskInFcFormat,
+    searchResults,
     selectedProjects,
     selectedTags,
     firstDate,
@@ -441,11 +555,18 @@ export const useTaskStoreWs = defineStore('taskStoreWs', () => {
     toggleCompletionWs,
     assignProjectWs,
     createTaskWs,
+    createTasksWs,
     deleteTaskWs,
+    bulkCompleteWs,
+    bulkDeleteWs,
+    bulkMoveWs,
+    bulkAssignProjectWs,
+    searchTasksWs,
     updateTaskWs,
     taskDroppedToCal,
     archiveTaskWs,
     updateTaskOrderWs,
+    moveTaskWs,
     pushToArchiveTask,
     taskDroppedToBrainDumpWs,
     turnOffRepeat,
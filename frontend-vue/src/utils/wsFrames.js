@@ -0,0 +1,22 @@
+/**
+ * Query string asking the backend for compressed frames, empty when the
+ * browser can't inflate them (see backend apps/core/compression.py)
+ * @returns {string}
+ */
+export function wsCompressionQuery() {
+  return typeof DecompressionStream === 'undefined' ? '' : '?compression=deflate'
+}
+
+/**
+ * Parse a websocket frame, big frames arrive as zlib compressed binary
+ * @param {string|Blob|ArrayBuffer} data - `MessageEvent.data` of the frame
+ * @returns {Promise<Object>} Parsed message
+ */
+export async function parseWsFrame(data) {
+  if (typeof data === 'string') {
+    return JSON.parse(data)
+  }
+  const blob = data instanceof Blob ? data : new Blob([data])
+  const inflated = blob.stream().pipeThrough(new DecompressionStream('deflate'))
+  return JSON.parse(await new Response(inflated).text())
+}